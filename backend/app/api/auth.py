@@ -33,7 +33,7 @@ async def create_user(
         )
     user = User(
         email=user_in.email,
-        hashed_password=security.get_password_hash(user_in.password),
+        hashed_password=await security.get_password_hash(user_in.password),
         full_name=user_in.full_name,
     )
     db.add(user)
@@ -53,7 +53,7 @@ async def login_access_token(
     result = await db.execute(select(User).where(User.email == form_data.username))
     user = result.scalars().first()
 
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    if not user or not await security.verify_password(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=400, detail="Incorrect email or password")
 
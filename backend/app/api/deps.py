@@ -1,5 +1,5 @@
 from typing import Generator, Optional
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from pydantic import ValidationError
@@ -8,8 +8,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core import security
 from app.core.config import settings
 from app.core.db import get_db
+from app.core.profiling import span
 from app.models.models import User
 from app.schemas.schemas import TokenData
+from app.services.scheduler import set_caller
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/auth/login")
@@ -20,8 +22,9 @@ async def get_current_user(
     token: str = Depends(reusable_oauth2)
 ) -> User:
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY,
-                             algorithms=[settings.ALGORITHM])
+        with span("auth", "jwt_decode"):
+            payload = jwt.decode(token, settings.SECRET_KEY,
+                                 algorithms=[settings.ALGORITHM])
         token_data = TokenData(email=payload.get("sub"))
     except (JWTError, ValidationError):
         raise HTTPException(
@@ -32,4 +35,11 @@ async def get_current_user(
     user = result.scalars().first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    # LLM calls made for this request are fair-shared per user
+    set_caller(f"user:{user.id}")
     return user
+
+
+async def get_client_caller(request: Request) -> None:
+    """Unauthenticated endpoints that may call the LLM fair-share it per client address."""
+    set_caller(f"client:{request.client.host if request.client else 'unknown'}")
@@ -1,32 +1,82 @@
 from typing import List, Any
-from fastapi import APIRouter, Depends, Query
+import hashlib
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy import func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from app.api import deps
 from app.core.db import get_db
+from app.core.http import CACHE_SHORT, etag_matches, not_modified, set_cache_headers
+from app.core.state import state
 from app.models.models import JobRole
 from app.schemas.schemas import JobRoleResponse
 from app.services.ai_service import ai_service
-import json
+from app.services.embeddings import embedding_service
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+MAX_RESULTS = 10
+# Only ask the LLM when prefix + semantic search together found fewer than this
+AI_FALLBACK_BELOW = 3
+CATALOG_VERSION_TTL = 30  # seconds
+CATALOG_VERSION_KEY = "job_roles:catalog_version"
+
+
+async def _get_catalog_version(db: AsyncSession) -> str:
+    """Cheap fingerprint of the job_roles table, memoized briefly in shared state."""
+    version = await state.get(CATALOG_VERSION_KEY)
+    if version is None:
+        count, max_id = (await db.execute(select(func.count(JobRole.id), func.max(JobRole.id)))).first()
+        version = f"{count}-{max_id}"
+        await state.set(CATALOG_VERSION_KEY, version, ttl=CATALOG_VERSION_TTL)
+    return version
 
-@router.get("/search", response_model=List[JobRoleResponse])
+
+@router.get("/search", response_model=List[JobRoleResponse], dependencies=[Depends(deps.get_client_caller)])
 async def search_job_roles(
+    request: Request,
+    response: Response,
     q: str = Query(..., min_length=2),
     db: AsyncSession = Depends(get_db)
 ) -> Any:
     """
-    Search for job roles using full-text search and AI fallback.
+    Search for job roles using prefix search, then semantic search, then AI fallback.
+    The ETag is derived from the role catalog version and the query, so repeat
+    searches revalidate without running the search.
     """
+    catalog_version = await _get_catalog_version(db)
+    query_hash = hashlib.sha1(q.strip().lower().encode()).hexdigest()[:12]
+    etag = f'W/"roles-{catalog_version}-{query_hash}"'
+    if etag_matches(request, etag):
+        return not_modified(etag, CACHE_SHORT)
+    set_cache_headers(response, etag, CACHE_SHORT)
+
     # 1. Database Search (PostgreSQL ILIKE for prefix match)
     query = select(JobRole).where(JobRole.name.ilike(f"{q}%")).order_by(
-        JobRole.popularity.desc()).limit(10)
+        JobRole.popularity.desc()).limit(MAX_RESULTS)
     result = await db.execute(query)
-    roles = result.scalars().all()
+    roles = list(result.scalars().all())
 
-    # 2. AI Fallback: If few results, call AI to suggest more roles
+    # 2. Semantic Search: nearest roles in the local embedding index
     if len(roles) < 5:
+        try:
+            matches = await embedding_service.search_roles(q, k=MAX_RESULTS)
+        except Exception:
+            logger.exception("Semantic role search failed for %r", q)
+            matches = []
+        existing_ids = {r.id for r in roles}
+        match_ids = [role_id for role_id, _, _ in matches if role_id not in existing_ids]
+        if match_ids:
+            result = await db.execute(select(JobRole).where(JobRole.id.in_(match_ids)))
+            by_id = {r.id: r for r in result.scalars().all()}
+            roles.extend(by_id[i] for i in match_ids if i in by_id)
+            roles = roles[:MAX_RESULTS]
+
+    # 3. AI Fallback: only when neither search found enough
+    if len(roles) < AI_FALLBACK_BELOW:
         ai_suggestions = await ai_service.suggest_job_roles(q)
         # Add AI suggestions that aren't already in the list
         existing_names = {r.name.lower() for r in roles}
@@ -34,7 +84,7 @@ async def search_job_roles(
             if suggestion.lower() not in existing_names:
                 # We return them as transient JobRole objects
                 roles.append(JobRole(name=suggestion, category="AI Suggested"))
-                if len(roles) >= 10:
+                if len(roles) >= MAX_RESULTS:
                     break
 
     return roles
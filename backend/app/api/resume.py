@@ -1,29 +1,42 @@
-from typing import Any, List
-import shutil
-import os
+from typing import Any, List, Optional
 import json
+import hashlib
 import asyncio
-import aiofiles
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, BackgroundTasks, Form
+import logging
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, BackgroundTasks, Form, Header, Request, Response
+from fastapi.responses import FileResponse
+from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, undefer
 
+from app.core.config import settings
 from app.core.db import get_db, SessionLocal
+from app.core.http import (
+    CACHE_IMMUTABLE, CACHE_REVALIDATE, CACHE_STATIC, etag_matches, not_modified, set_cache_headers
+)
+from app.core.metrics import BACKGROUND_JOBS, BACKGROUND_QUEUE_DEPTH, GENERATION_MEMO
 from app.api import deps
-from app.models.models import User, Resume, JobDescription, Application
+from app.models.models import User, Resume, JobDescription, Application, Blob
 from app.schemas.schemas import (
     ResumeResponse, JobDescriptionResponse, ApplicationResponse, JobDescriptionCreate,
     ApplicationCreate, TemplateResponse, ResumeCreateScratch, ResumeUpdateSection,
-    SectionAISuggestionRequest, SectionAISuggestionResponse
+    SectionAISuggestionRequest, SectionAISuggestionResponse, ResumeMatchResponse,
+    ApplicationSectionRegenerate
 )
 from app.services.pdf import extract_text
-from app.services.ai_service import ai_service
+from app.services.ai_service import ai_service, parse_failed
+from app.services.embeddings import embedding_service
+from app.services.renderer import pdf_renderer, render_key
+from app.services.storage import acquire_blob, blob_store, collect_blob, release_blob
+from app.services import ats, jobs
+from app.services.idempotency import idempotent, request_fingerprint
+from app.services.scheduler import BACKGROUND, set_caller
+from app.services.suggestions import get_suggestions
 
-router = APIRouter()
+logger = logging.getLogger(__name__)
 
-UPLOAD_DIR = "uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+router = APIRouter()
 
 
 TEMPLATES = [
@@ -40,8 +53,28 @@ TEMPLATES = [
 ]
 
 
+# TEMPLATES only changes with a deploy, so hash it once at import
+TEMPLATES_ETAG = '"templates-%s"' % hashlib.sha256(
+    json.dumps(TEMPLATES, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def resume_etag(resume: Resume) -> str:
+    return f'W/"resume-{resume.id}-v{resume.version}"'
+
+
+def job_hash(position: str, text_content: str) -> str:
+    return hashlib.sha256(f"{position}\n{text_content}".encode("utf-8")).hexdigest()
+
+
+def application_etag(app_id: int, status: str, revision: int = 0) -> str:
+    return f'W/"application-{app_id}-{status}-r{revision or 0}"'
+
+
 @router.get("/templates", response_model=List[TemplateResponse])
-async def list_templates():
+async def list_templates(request: Request, response: Response):
+    if etag_matches(request, TEMPLATES_ETAG):
+        return not_modified(TEMPLATES_ETAG, CACHE_STATIC)
+    set_cache_headers(response, TEMPLATES_ETAG, CACHE_STATIC)
     return TEMPLATES
 
 
@@ -50,37 +83,101 @@ async def upload_resume(
     *,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(deps.get_current_user),
-    file: UploadFile = File(...)
+    file: UploadFile = File(...),
+    idempotency_key: Optional[str] = Header(None),
 ) -> Any:
     """
     Upload a resume file (PDF/DOCX), parse it, and save to DB.
+    The original is stored once per unique content in the blob store.
+    With an Idempotency-Key, retries of the same file return the first upload's resume.
     """
-    file_location = f"{UPLOAD_DIR}/{current_user.id}_{file.filename}"
-    async with aiofiles.open(file_location, "wb+") as buffer:
-        while content := await file.read(1024):  # Chuck wise read
-            await buffer.write(content)
-
-    # Extract Text (Non-blocking)
-    text_content = await extract_text(file_location, file.content_type or "")
-    if not text_content:
-        raise HTTPException(
-            status_code=400, detail="Could not extract text from file")
+    async with blob_store.ingest(file) as blob:
+        fingerprint = request_fingerprint("upload", [blob.sha256, file.filename])
+        async with idempotent("upload", current_user.id, idempotency_key, fingerprint) as idem:
+            if idem.replay is not None:
+                return idem.replay
+
+            # Extract Text (Non-blocking)
+            text_content = await extract_text(blob.local_path, file.content_type or "")
+            if not text_content:
+                raise HTTPException(
+                    status_code=400, detail="Could not extract text from file")
+
+            # Parse with AI
+            parsed_data = await ai_service.parse_resume(text_content)
+
+            await acquire_blob(db, blob, file.content_type or "application/octet-stream")
+
+            resume = Resume(
+                user_id=current_user.id,
+                file_path=blob_store.key_for(blob.sha256),
+                blob_sha256=blob.sha256,
+                original_filename=file.filename,
+                raw_text=text_content,
+                parsed_content=parsed_data,
+                template_id="minimal-pro",  # Default
+                is_draft=False
+            )
+            db.add(resume)
+            await db.flush()
+            await db.refresh(resume)
+            response = ResumeResponse.model_validate(resume)
+            await idem.complete(db, 200, response)
+            await db.commit()
+    return response
 
-    # Parse with AI
-    parsed_data = await ai_service.parse_resume(text_content)
 
-    resume = Resume(
-        user_id=current_user.id,
-        file_path=file_location,
-        raw_text=text_content,
-        parsed_content=parsed_data,
-        template_id="minimal-pro",  # Default
-        is_draft=False
-    )
-    db.add(resume)
+@router.get("/{resume_id}/original")
+async def download_original(
+    resume_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Download the originally uploaded file. Content-addressed, so the sha256 is a strong ETag.
+    """
+    result = await db.execute(
+        select(Resume.original_filename, Blob.sha256, Blob.content_type)
+        .join(Blob, Blob.sha256 == Resume.blob_sha256)
+        .where(Resume.id == resume_id, Resume.user_id == current_user.id))
+    row = result.first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Original file not found")
+    etag = f'"{row.sha256}"'
+    if etag_matches(request, etag):
+        return not_modified(etag, CACHE_IMMUTABLE)
+    return await blob_store.download_response(
+        row.sha256, row.original_filename or f"resume-{resume_id}", row.content_type,
+        headers={"ETag": etag, "Cache-Control": CACHE_IMMUTABLE})
+
+
+@router.delete("/{resume_id}", status_code=204)
+async def delete_resume(
+    resume_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Response:
+    """
+    Delete a resume that has no applications, releasing its reference on the stored original.
+    """
+    result = await db.execute(select(Resume).where(Resume.id == resume_id, Resume.user_id == current_user.id))
+    resume = result.scalars().first()
+    if not resume:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    result = await db.execute(select(Application.id).where(Application.resume_id == resume_id).limit(1))
+    if result.first():
+        raise HTTPException(
+            status_code=409, detail="Resume has generated applications and cannot be deleted")
+
+    sha256 = resume.blob_sha256
+    await db.delete(resume)
+    await db.flush()
+    orphaned = await release_blob(db, sha256) if sha256 else False
     await db.commit()
-    await db.refresh(resume)
-    return resume
+    if orphaned:
+        await collect_blob(db, sha256)
+    return Response(status_code=204)
 
 
 @router.post("/scratch", response_model=ResumeResponse)
@@ -117,10 +214,36 @@ async def create_resume_from_scratch(
     return resume
 
 
+@router.get("/{resume_id}", response_model=ResumeResponse)
+async def get_resume(
+    resume_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Fetch a resume. The ETag tracks Resume.version, so unchanged resumes revalidate with 304.
+    """
+    result = await db.execute(
+        select(Resume.id, Resume.version).where(Resume.id == resume_id, Resume.user_id == current_user.id))
+    row = result.first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    etag = resume_etag(row)
+    if etag_matches(request, etag):
+        return not_modified(etag, CACHE_REVALIDATE)
+
+    result = await db.execute(select(Resume).where(Resume.id == resume_id))
+    set_cache_headers(response, etag, CACHE_REVALIDATE)
+    return result.scalars().first()
+
+
 @router.patch("/{resume_id}/update-section", response_model=ResumeResponse)
 async def update_resume_section(
     resume_id: int,
     section_in: ResumeUpdateSection,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
@@ -138,24 +261,28 @@ async def update_resume_section(
     db.add(resume)
     await db.commit()
     await db.refresh(resume)
+    set_cache_headers(response, resume_etag(resume), CACHE_REVALIDATE)
     return resume
 
 
 @router.post("/ai-assistant", response_model=SectionAISuggestionResponse)
 async def get_ai_assistant_suggestions(
     req: SectionAISuggestionRequest,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
     """
     Get AI-powered suggestions for specific resume sections.
+    Empty sections are served from the precomputed suggestion store; sections with
+    content always go to the model.
     """
-    suggestions = await ai_service.get_section_suggestions(
+    return await get_suggestions(
+        db,
         section_name=req.section_name,
         job_role=req.job_role,
         experience_level=req.experience_level,
         current_content=req.current_content
     )
-    return suggestions
 
 
 @router.post("/job", response_model=JobDescriptionResponse)
@@ -179,12 +306,41 @@ async def submit_job_description(
     return job
 
 
+@router.get("/{resume_id}/match/{job_id}", response_model=ResumeMatchResponse)
+async def match_resume_to_job(
+    resume_id: int,
+    job_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Semantic similarity between a resume and a job description, from local embeddings.
+    """
+    result = await db.execute(
+        select(Resume).where(Resume.id == resume_id, Resume.user_id == current_user.id)
+        .options(undefer(Resume.raw_text)))
+    resume = result.scalars().first()
+    if not resume:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    result = await db.execute(select(JobDescription).where(JobDescription.id == job_id, JobDescription.user_id == current_user.id))
+    job = result.scalars().first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job description not found")
+
+    resume_text = resume.raw_text or json.dumps(resume.parsed_content or {})
+    score = await embedding_service.similarity(resume_text, job.text_content or "")
+    return {"resume_id": resume_id, "job_id": job_id, "score": score}
+
+
 async def background_generate_resume(app_id: int):
     """
     Background worker for resume generation.
     Creates its own DB session to avoid detached instances or concurrency issues.
     """
+    BACKGROUND_QUEUE_DEPTH.labels("generate_resume").dec()
+    jobs.track(asyncio.current_task())
     async with SessionLocal() as db:
+        application = None
         try:
             # Re-fetch application with relationships
             result = await db.execute(
@@ -195,9 +351,17 @@ async def background_generate_resume(app_id: int):
             application = result.scalars().first()
 
             if not application:
-                print(f"Application {app_id} not found in worker")
+                logger.warning("Application %s not found in worker", app_id)
+                BACKGROUND_JOBS.labels("generate_resume", "missing").inc()
                 return
 
+            # Queue behind interactive calls, fair-shared against the owner's other work
+            set_caller(f"user:{application.user_id}", BACKGROUND)
+
+            # Record the inputs actually used, for the generation memo
+            application.resume_version = application.resume.version
+            application.prompt_version = ai_service.generation_version
+
             # AI Logic
             generated_resume = await ai_service.generate_tailored_resume(
                 application.resume.parsed_content,
@@ -206,10 +370,20 @@ async def background_generate_resume(app_id: int):
                 template_id=application.template_id
             )
 
-            ats_result = await ai_service.calculate_ats_score(
-                str(generated_resume),
-                application.job.text_content
-            )
+            ats_result = None
+            if not parse_failed(generated_resume):
+                ats_result = await ai_service.calculate_ats_score(
+                    str(generated_resume),
+                    application.job.text_content
+                )
+            if ats_result is None or parse_failed(ats_result):
+                # Never store an unparseable reply as a finished result (the memo would reuse it)
+                logger.error("Unparseable model output generating application %s", app_id)
+                BACKGROUND_JOBS.labels("generate_resume", "failed").inc()
+                application.status = "failed"
+                db.add(application)
+                await db.commit()
+                return
 
             # Update DB
             application.generated_content = generated_resume  # It's already a dict
@@ -219,12 +393,70 @@ async def background_generate_resume(app_id: int):
 
             db.add(application)
             await db.commit()
+            BACKGROUND_JOBS.labels("generate_resume", "completed").inc()
+
+        except asyncio.CancelledError:
+            # Worker is shutting down and the drain window ran out: hand the job to the next worker
+            logger.warning("Requeueing interrupted generation for application %s", app_id)
+            BACKGROUND_JOBS.labels("generate_resume", "requeued").inc()
+            await _requeue_generation(app_id)
+            raise
+
+        except Exception:
+            logger.exception("Error in background generation for application %s", app_id)
+            BACKGROUND_JOBS.labels("generate_resume", "failed").inc()
+            if application is not None:
+                await db.rollback()
+                application.status = "failed"
+                db.add(application)
+                await db.commit()
+
+
+async def _requeue_generation(app_id: int):
+    async with SessionLocal() as db:
+        await db.execute(
+            update(Application)
+            .where(Application.id == app_id, Application.status == "processing")
+            .values(status="queued"))
+        await db.commit()
 
-        except Exception as e:
-            print(f"Error in background generation: {e}")
-            application.status = "failed"
-            db.add(application)
-            await db.commit()
+
+async def resume_queued_generations() -> int:
+    """
+    Restart generations requeued by a previous shutdown. Each row is claimed with a
+    conditional UPDATE, so with several workers starting at once every job runs exactly once.
+    """
+    async with SessionLocal() as db:
+        result = await db.execute(select(Application.id).where(Application.status == "queued"))
+        claimed = []
+        for app_id in result.scalars().all():
+            claim = await db.execute(
+                update(Application)
+                .where(Application.id == app_id, Application.status == "queued")
+                .values(status="processing"))
+            if claim.rowcount:
+                claimed.append(app_id)
+        await db.commit()
+    for app_id in claimed:
+        BACKGROUND_QUEUE_DEPTH.labels("generate_resume").inc()
+        jobs.spawn(background_generate_resume(app_id))
+    return len(claimed)
+
+
+async def run_requeue_sweeper() -> None:
+    """
+    Keep resuming requeued generations while the worker runs, so jobs handed back by a
+    worker that shut down are picked up by the live ones rather than the next to start.
+    """
+    while True:
+        await asyncio.sleep(settings.REQUEUE_SWEEP_INTERVAL)
+        try:
+            resumed = await resume_queued_generations()
+        except Exception:
+            logger.exception("Resuming requeued generations failed")
+            continue
+        if resumed:
+            logger.info("Resumed %d generation(s) requeued by another worker", resumed)
 
 
 @router.post("/generate", response_model=ApplicationResponse, status_code=202)
@@ -232,38 +464,239 @@ async def generate_tailored_resume(
     app_in: ApplicationCreate,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(deps.get_current_user),
-    background_tasks: BackgroundTasks = BackgroundTasks()
+    background_tasks: BackgroundTasks = BackgroundTasks(),
+    idempotency_key: Optional[str] = Header(None),
 ) -> Any:
     """
     Start background job to generate resume. Returns HTTP 202 Accepted.
     Poll /application/{id} for result.
+    If the same resume version was already tailored to the same job and template with the
+    current prompts, the result is copied and returned completed; set regenerate to force a new one.
+    With an Idempotency-Key, retries return the original application instead of queueing another generation.
     """
-    # Create Application Record first
-    application = Application(
-        user_id=current_user.id,
-        resume_id=app_in.resume_id,
-        job_id=app_in.job_id,
-        template_id=app_in.template_id or "modern-ats",
-        status="processing"
-    )
-    db.add(application)
-    await db.commit()
-    await db.refresh(application)
+    fingerprint = request_fingerprint("generate", app_in.model_dump())
+    async with idempotent("generate", current_user.id, idempotency_key, fingerprint) as idem:
+        if idem.replay is not None:
+            return idem.replay
+
+        result = await db.execute(
+            select(Resume.version).where(Resume.id == app_in.resume_id, Resume.user_id == current_user.id))
+        resume_version = result.scalar()
+        result = await db.execute(
+            select(JobDescription.position, JobDescription.text_content)
+            .where(JobDescription.id == app_in.job_id, JobDescription.user_id == current_user.id))
+        job = result.first()
+        if resume_version is None or job is None:
+            raise HTTPException(status_code=404, detail="Resume or job description not found")
+
+        memo_key = {
+            "resume_id": app_in.resume_id,
+            "resume_version": resume_version,
+            "job_hash": job_hash(job.position, job.text_content),
+            "template_id": app_in.template_id or "modern-ats",
+            "prompt_version": ai_service.generation_version,
+        }
+        previous = None
+        if app_in.regenerate:
+            GENERATION_MEMO.labels("bypass").inc()
+        else:
+            result = await db.execute(
+                select(Application)
+                .where(*(getattr(Application, column) == value for column, value in memo_key.items()),
+                       Application.status == "completed",
+                       Application.revision == 0)  # Untouched by section regeneration
+                .order_by(Application.id.desc())
+                .limit(1))
+            previous = result.scalars().first()
+            # Rows completed before parse failures were marked failed may hold the placeholder
+            if previous is not None and (parse_failed(previous.generated_content)
+                                         or parse_failed(previous.ats_feedback)):
+                previous = None
+            GENERATION_MEMO.labels("hit" if previous is not None else "miss").inc()
+
+        # Create Application Record first
+        application = Application(
+            user_id=current_user.id,
+            job_id=app_in.job_id,
+            status="processing",
+            **memo_key
+        )
+        if previous is not None:
+            # Same resume version, job, template and prompts: copy the finished result
+            application.generated_content = previous.generated_content
+            application.ats_score = previous.ats_score
+            application.ats_feedback = previous.ats_feedback
+            application.status = "completed"
+        db.add(application)
+        await db.flush()
+        await db.refresh(application)
+        response = ApplicationResponse.model_validate(application)
+        await idem.complete(db, 202, response)
+        await db.commit()
 
-    # Enqueue Task
-    background_tasks.add_task(background_generate_resume, application.id)
+    if response.status == "processing":
+        # Enqueue Task
+        BACKGROUND_QUEUE_DEPTH.labels("generate_resume").inc()
+        background_tasks.add_task(background_generate_resume, response.id)
 
-    return application
+    return response
 
 
 @router.get("/application/{app_id}", response_model=ApplicationResponse)
 async def get_application(
     app_id: int,
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(deps.get_current_user)
 ) -> Any:
-    result = await db.execute(select(Application).where(Application.id == app_id, Application.user_id == current_user.id))
+    """
+    Poll a generation. Revalidates on status and revision (bumped by section regeneration)
+    without loading the content.
+    """
+    result = await db.execute(
+        select(Application.status, Application.revision)
+        .where(Application.id == app_id, Application.user_id == current_user.id))
+    row = result.first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Application not found")
+    etag = application_etag(app_id, row.status, row.revision)
+    if etag_matches(request, etag):
+        return not_modified(etag, CACHE_REVALIDATE)
+
+    result = await db.execute(select(Application).where(Application.id == app_id))
+    application = result.scalars().first()
+    # Status may have moved on between the two reads; describe what we actually return
+    set_cache_headers(
+        response, application_etag(app_id, application.status, application.revision), CACHE_REVALIDATE)
+    return application
+
+
+def _section_sources(section_name: str, index: Optional[int], source: dict, generated: dict) -> Any:
+    """The slice of the original resume a section is written from."""
+    if section_name == "summary":
+        return {
+            "summary": source.get("summary"),
+            "skills": generated.get("skills") or source.get("skills"),
+            "roles": [f"{job.get('role')} at {job.get('company')}"
+                      for job in source.get("work_experience") or [] if isinstance(job, dict)],
+        }
+    value = source.get(section_name)
+    if index is not None and isinstance(value, list):
+        return value[index] if index < len(value) else None
+    return value
+
+
+@router.post("/application/{app_id}/regenerate-section", response_model=ApplicationResponse)
+async def regenerate_application_section(
+    app_id: int,
+    section_in: ApplicationSectionRegenerate,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Regenerate one section of a completed application (or one entry of a list section)
+    from only its source data and the JD keywords, merge it in place and rescore ATS for
+    that section locally.
+    """
+    result = await db.execute(
+        select(Application)
+        .where(Application.id == app_id, Application.user_id == current_user.id)
+        .options(selectinload(Application.resume), selectinload(Application.job)))
     application = result.scalars().first()
     if not application:
         raise HTTPException(status_code=404, detail="Application not found")
+    if application.status != "completed" or not application.generated_content:
+        raise HTTPException(status_code=409, detail="Application has not finished generating")
+
+    generated = dict(application.generated_content)
+    section_name, index = section_in.section_name, section_in.index
+    if section_name not in generated:
+        raise HTTPException(status_code=400, detail=f"Unknown section '{section_name}'")
+    current = generated[section_name]
+    if index is not None:
+        if not isinstance(current, list) or not 0 <= index < len(current):
+            raise HTTPException(status_code=400, detail="Section index out of range")
+        current = current[index]
+
+    feedback = ats.ensure_baseline(application.ats_feedback, generated,
+                                   application.job.text_content, application.ats_score)
+    try:
+        new_value = await ai_service.regenerate_section(
+            section_name,
+            current,
+            _section_sources(section_name, index, application.resume.parsed_content or {}, generated),
+            feedback["jd_keywords"],
+            application.job.position,
+            instructions=section_in.instructions,
+        )
+        # The layout and ATS rescoring depend on the shape: a job entry must stay a dict,
+        # a list section must stay a list
+        for container in (dict, list):
+            if isinstance(current, container) and not isinstance(new_value, container):
+                raise ValueError(f"Expected a {container.__name__} for {section_name}, "
+                                 f"got {type(new_value).__name__}")
+    except ValueError:
+        logger.warning("Unusable section regeneration output for application %s (prompt %s)",
+                       app_id, ai_service.section_version)
+        raise HTTPException(status_code=502, detail="The AI model returned no usable content for this section, please retry")
+
+    if index is not None:
+        entries = list(generated[section_name])
+        entries[index] = new_value
+        generated[section_name] = entries
+    else:
+        generated[section_name] = new_value
+    score, feedback = ats.rescore_section(feedback, section_name, generated[section_name])
+
+    # Optimistic concurrency: a concurrent regeneration of this application wins, we 409
+    revision = application.revision or 0
+    result = await db.execute(
+        update(Application)
+        .where(Application.id == app_id, Application.revision == application.revision)
+        .values(generated_content=generated, ats_score=score, ats_feedback=feedback, revision=revision + 1))
+    if not result.rowcount:
+        raise HTTPException(status_code=409, detail="Application was modified concurrently, please retry")
+    await db.commit()
+
+    result = await db.execute(select(Application).where(Application.id == app_id))
+    application = result.scalars().first()
+    set_cache_headers(
+        response, application_etag(app_id, application.status, application.revision), CACHE_REVALIDATE)
     return application
+
+
+@router.get("/application/{app_id}/pdf")
+async def download_application_pdf(
+    app_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    """
+    Render the generated resume to PDF server-side.
+    Served from the render cache when the same content/template was rendered before;
+    supports If-None-Match and Range requests.
+    """
+    result = await db.execute(select(Application).where(Application.id == app_id, Application.user_id == current_user.id))
+    application = result.scalars().first()
+    if not application:
+        raise HTTPException(status_code=404, detail="Application not found")
+    if application.status != "completed" or not application.generated_content:
+        raise HTTPException(
+            status_code=409, detail="Resume generation has not completed yet")
+
+    key = render_key(application.generated_content, application.template_id)
+    etag = f'"{key}"'
+    cache_control = "private, max-age=0, must-revalidate"
+    if etag_matches(request, etag):
+        return not_modified(etag, cache_control)
+
+    path = await pdf_renderer.render(application.generated_content, application.template_id, key=key)
+    return FileResponse(
+        path,
+        media_type="application/pdf",
+        filename=f"resume-{app_id}.pdf",
+        headers={"ETag": etag, "Cache-Control": cache_control},
+    )
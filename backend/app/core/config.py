@@ -1,4 +1,5 @@
 import os
+from typing import Dict, Optional
 from pydantic_settings import BaseSettings
 
 
@@ -16,20 +17,117 @@ class Settings(BaseSettings):
     POSTGRES_SERVER: str
     POSTGRES_PORT: str = "5432"
     POSTGRES_DB: str
+    # Full SQLAlchemy URL (e.g. sqlite+aiosqlite:///./bench.db); overrides the POSTGRES_* parts
+    SQLALCHEMY_DATABASE_URI: str = ""
+    # Log every SQL statement. Logging is synchronous, so keep this off outside debugging.
+    SQL_ECHO: bool = False
+    # Create missing tables when a process starts. gunicorn.conf.py turns this off and
+    # creates them once in the master instead.
+    CREATE_TABLES: bool = True
 
     @property
     def DATABASE_URL(self) -> str:
+        if self.SQLALCHEMY_DATABASE_URI:
+            return self.SQLALCHEMY_DATABASE_URI
         return f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
 
     # AI
-    AI_PROVIDER: str = "ollama"  # or "gemini"
+    AI_PROVIDER: str = "ollama"  # or "gemini", or "stub" for offline benchmarks
     GEMINI_API_KEY: str = ""
     OLLAMA_HOST: str = "http://host.docker.internal:11434"
     AI_MODEL: str = "llama3"
+    # Per-method model overrides (JSON in env), e.g.
+    # {"suggest_job_roles": "llama3.2:1b", "generate_tailored_resume": "llama3:8b"}
+    AI_MODEL_ROUTES: Dict[str, str] = {}
+    # How long Ollama keeps a model loaded after its last request
+    OLLAMA_KEEP_ALIVE: str = "30m"
+    # Load every routed model at startup so the first request doesn't pay for it
+    OLLAMA_PRELOAD: bool = True
+    OLLAMA_MAX_CTX: int = 16384
+
+    # Stub provider (AI_PROVIDER=stub)
+    STUB_LATENCY_MS: float = 200
+    STUB_JITTER_MS: float = 50
+    STUB_FAILURE_RATE: float = 0.0
+    STUB_SEED: Optional[int] = None
+
+    # Embeddings (semantic role search, resume-to-JD matching)
+    EMBEDDING_PROVIDER: str = "ollama"  # or "stub" for the offline hashing embedder
+    EMBEDDING_MODEL: str = "nomic-embed-text"
+    EMBEDDING_INDEX_DIR: str = "embeddings"
+    SEMANTIC_MIN_SCORE: float = 0.35
+
+    # zstd level for compressed resume bodies (raw_text, parsed_content)
+    BODY_COMPRESSION_LEVEL: int = 3
+
+    # Uploaded file storage
+    STORAGE_BACKEND: str = "local"  # or "s3"
+    BLOB_DIR: str = "uploads"  # Local blobs, and the spool directory for every backend
+    BLOB_WRITE_BUFFER: int = 1024 * 1024
+    BLOB_FSYNC: bool = False
+    S3_ENDPOINT_URL: str = ""  # e.g. http://minio:9000 for a local stand-in
+    S3_BUCKET: str = "resume-uploads"
+    S3_REGION: str = "us-east-1"
+    S3_ACCESS_KEY_ID: str = ""
+    S3_SECRET_ACCESS_KEY: str = ""
+
+    # PDF rendering
+    PDF_RENDER_WORKERS: int = 2
+    PDF_CACHE_DIR: str = "render_cache"
+    PDF_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+
+    # Responses at least this large are brotli/gzip compressed
+    COMPRESSION_MIN_SIZE: int = 1024
 
     # Redis
     REDIS_URL: str = "redis://redis:6379/0"
 
+    # Shared state (caches, locks, rate limits): "memory" for one process, "redis" for several
+    STATE_BACKEND: str = "memory"
+    # Seconds spawned background jobs get to finish at shutdown before being requeued
+    SHUTDOWN_DRAIN_TIMEOUT: float = 5
+    # How often each worker picks up generations requeued by a worker that shut down
+    REQUEUE_SWEEP_INTERVAL: float = 30
+
+    # LLM fair-share scheduler. Concurrency limits are per worker process; token quotas
+    # are counted in shared state, so they hold across workers with STATE_BACKEND=redis.
+    LLM_MAX_CONCURRENCY: int = 4
+    LLM_USER_CONCURRENCY: int = 2
+    LLM_USER_TOKENS_PER_MINUTE: int = 20000  # 0 disables the quota
+    # Interactive calls queued longer than this are shed with 503 (background work waits)
+    LLM_INTERACTIVE_QUEUE_BUDGET: float = 5
+
+    # Precomputed section suggestions for the most popular roles (0 disables the warmer)
+    SUGGESTION_WARM_TOP_ROLES: int = 20
+    SUGGESTION_REFRESH_HOURS: int = 24
+    # Off-peak window (UTC hours, start inclusive, end exclusive) the warmer runs in
+    SUGGESTION_WARM_START_HOUR: int = 2
+    SUGGESTION_WARM_END_HOUR: int = 6
+
+    # Per-request profiling (all off by default). Requests sending X-Profile: <PROFILE_TOKEN>
+    # or sampled at PROFILE_SAMPLE_RATE get a sampling profile and span timeline;
+    # with PROFILE_SLOW_MS set, any request slower than it gets its span timeline.
+    PROFILE_TOKEN: str = ""
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_SLOW_MS: float = 0
+    PROFILE_DIR: str = "profiles"
+    PROFILE_KEEP: int = 200  # Newest captures kept
+
+    # Event-loop health. A heartbeat measures how late the loop runs it; a watchdog thread
+    # logs the loop's stack whenever a callback holds it longer than LOOP_BLOCK_THRESHOLD_MS.
+    LOOP_MONITOR: bool = True
+    LOOP_MONITOR_INTERVAL_MS: float = 50
+    LOOP_BLOCK_THRESHOLD_MS: float = 100
+    # Development/tests: fail (500) any request whose task blocked the loop longer than this
+    LOOP_STRICT_MS: float = 0
+
+    # Idempotency-Key support for POST /resume/generate and /resume/upload
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    # How long a retry waits on a duplicate still being processed before getting 409
+    IDEMPOTENCY_WAIT_SECONDS: float = 30
+    # A claimed key not renewed for this long (its worker died) can be taken over by a retry
+    IDEMPOTENCY_LEASE_SECONDS: float = 30
+
     # CORS
     BACKEND_CORS_ORIGINS: list[str] = [
         "http://localhost:5173", "http://localhost:3000"]
@@ -0,0 +1,39 @@
+from typing import Optional
+from fastapi import Request, Response
+
+# Cache-Control policies
+CACHE_STATIC = "public, max-age=86400"  # Deploy-static data (template catalog)
+CACHE_SHORT = "public, max-age=300"  # Near-static lookups (job role search)
+CACHE_IMMUTABLE = "private, max-age=31536000, immutable"  # Finished, per-user results
+CACHE_REVALIDATE = "private, no-cache"  # Mutable per-user data: always revalidate via ETag
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    True if the request's If-None-Match covers etag (weak comparison).
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    wanted = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == wanted:
+            return True
+    return False
+
+
+def not_modified(etag: str, cache_control: Optional[str] = None) -> Response:
+    headers = {"ETag": etag}
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+    return Response(status_code=304, headers=headers)
+
+
+def set_cache_headers(response: Response, etag: str, cache_control: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
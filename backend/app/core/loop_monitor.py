@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+import weakref
+from collections import deque
+from typing import Deque, Optional
+
+from app.core.config import settings
+from app.core.metrics import EVENT_LOOP_BLOCKS, EVENT_LOOP_LAG, EVENT_LOOP_LAG_QUANTILE
+
+logger = logging.getLogger(__name__)
+
+QUANTILE_WINDOW = 60  # seconds of heartbeats the percentile gauges cover
+QUANTILE_PUBLISH_INTERVAL = 1  # seconds
+QUANTILES = (("0.5", 0.5), ("0.95", 0.95), ("0.99", 0.99))
+
+
+class LoopBlocked(RuntimeError):
+    """A request's task held the event loop longer than LOOP_STRICT_MS (strict mode only)."""
+
+
+class LoopMonitor:
+    """
+    Event-loop health guard for one worker process.
+    A heartbeat task sleeps for a fixed interval and records how late it wakes up.
+    A watchdog thread polls the heartbeat; when it is overdue by LOOP_BLOCK_THRESHOLD_MS
+    the loop is stuck in some callback, so the loop thread's current stack is logged
+    while it is still blocked. In strict mode the blocked request task is flagged too.
+    """
+
+    def __init__(self, interval_ms: float, block_threshold_ms: float, strict_ms: float):
+        self.interval = interval_ms / 1000
+        self.block_threshold = block_threshold_ms / 1000
+        self.strict = strict_ms / 1000
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        # When the next heartbeat is due (perf_counter), and the last deadline already reported
+        self._deadline: Optional[float] = None
+        self._reported: Optional[float] = None
+        # Strict mode: request tasks being checked, and the worst block seen for each
+        self._watched: "weakref.WeakSet[asyncio.Task]" = weakref.WeakSet()
+        self._blocked: "weakref.WeakKeyDictionary[asyncio.Task, float]" = weakref.WeakKeyDictionary()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        if self.block_threshold or self.strict:
+            self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stop.set()
+        self._task.cancel()
+        self._task = None
+        self._deadline = None
+
+    async def _heartbeat(self) -> None:
+        samples: Deque[float] = deque(maxlen=max(1, int(QUANTILE_WINDOW / self.interval)))
+        published = time.perf_counter()
+        while True:
+            self._deadline = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            lag = max(0.0, now - self._deadline)
+            EVENT_LOOP_LAG.observe(lag)
+            samples.append(lag)
+            if now - published >= QUANTILE_PUBLISH_INTERVAL:
+                published = now
+                ordered = sorted(samples)
+                for label, q in QUANTILES:
+                    EVENT_LOOP_LAG_QUANTILE.labels(label).set(ordered[min(len(ordered) - 1, int(q * len(ordered)))])
+
+    def _watch(self) -> None:
+        poll = max(0.005, min(t for t in (self.block_threshold, self.strict) if t) / 4)
+        while not self._stop.wait(poll):
+            deadline = self._deadline
+            if deadline is None:
+                continue
+            overdue = time.perf_counter() - deadline
+            if self.block_threshold and overdue >= self.block_threshold and self._reported != deadline:
+                self._reported = deadline
+                EVENT_LOOP_BLOCKS.inc()
+                frame = sys._current_frames().get(self._loop_thread)
+                stack = "".join(traceback.format_stack(frame)) if frame is not None else "  <unavailable>\n"
+                logger.warning("Event loop blocked for %.0f ms so far; loop thread is at:\n%s",
+                               overdue * 1000, stack.rstrip())
+            if self.strict and overdue >= self.strict:
+                task = self._current_task()
+                if task is not None and task in self._watched:
+                    self._blocked[task] = max(self._blocked.get(task, 0.0), overdue)
+
+    def _current_task(self) -> Optional[asyncio.Task]:
+        # Read from the watchdog thread while the loop is stuck inside that task's step
+        try:
+            return asyncio.current_task(self.loop)
+        except RuntimeError:
+            return None
+
+    def watch(self, task: asyncio.Task) -> None:
+        self._watched.add(task)
+
+    def blocked_for(self, task: asyncio.Task) -> float:
+        """Longest block (seconds) attributed to task so far; 0 if none."""
+        return self._blocked.get(task, 0.0)
+
+    def release(self, task: asyncio.Task) -> float:
+        self._watched.discard(task)
+        return self._blocked.pop(task, 0.0)
+
+
+loop_monitor = LoopMonitor(
+    interval_ms=settings.LOOP_MONITOR_INTERVAL_MS,
+    block_threshold_ms=settings.LOOP_BLOCK_THRESHOLD_MS,
+    strict_ms=settings.LOOP_STRICT_MS,
+)
+
+
+def loop_monitor_enabled() -> bool:
+    return bool(settings.LOOP_MONITOR or settings.LOOP_STRICT_MS)
+
+
+class StrictLoopMiddleware:
+    """
+    Development/test guard, only installed when LOOP_STRICT_MS is set. A request whose
+    task blocked the loop for longer gets a 500 instead of its response (when the block
+    happened before the response started) and LoopBlocked is raised, so the server logs
+    it and TestClient-based tests fail.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not loop_monitor.running:
+            await self.app(scope, receive, send)
+            return
+
+        task = asyncio.current_task()
+        loop_monitor.watch(task)
+        replaced = False
+
+        async def send_wrapper(message):
+            nonlocal replaced
+            if replaced:
+                return
+            if message["type"] == "http.response.start" and loop_monitor.blocked_for(task):
+                replaced = True
+                await send({"type": "http.response.start", "status": 500,
+                            "headers": [(b"content-type", b"text/plain; charset=utf-8")]})
+                await send({"type": "http.response.body", "body": b"Handler blocked the event loop"})
+                return
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            blocked = loop_monitor.release(task)
+        if blocked:
+            raise LoopBlocked(f"{scope['method']} {scope['path']} blocked the event loop for "
+                              f"{blocked * 1000:.0f} ms (LOOP_STRICT_MS={settings.LOOP_STRICT_MS:g})")
@@ -0,0 +1,194 @@
+import os
+import time
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+from starlette.responses import Response
+
+# HTTP
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time from request start until the last response byte is sent",
+    ["method", "handler", "status"],
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Requests currently being handled",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+
+# LLM provider calls
+LLM_REQUEST_DURATION = Histogram(
+    "llm_request_duration_seconds",
+    "Latency of a single LLM provider call",
+    ["provider", "method"],
+    buckets=(0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300),
+)
+LLM_MODEL_LATENCY = Histogram(
+    "llm_model_latency_seconds",
+    "Latency of Ollama calls by model, split by whether the call had to load the model",
+    ["model", "method", "start"],
+    buckets=(0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300),
+)
+LLM_MODEL_LOAD_DURATION = Histogram(
+    "llm_model_load_duration_seconds",
+    "Time Ollama spent loading a model into memory (cold starts and preloads)",
+    ["model"],
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 20, 30, 60),
+)
+LLM_QUEUE_WAIT = Histogram(
+    "llm_queue_wait_seconds",
+    "Time an LLM call waited in the fair-share scheduler for a slot",
+    ["priority"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+LLM_QUEUE_DEPTH = Gauge(
+    "llm_queue_depth",
+    "LLM calls waiting in the fair-share scheduler",
+    ["priority"],
+    multiprocess_mode="livesum",
+)
+LLM_SHED = Counter(
+    "llm_shed_total",
+    "LLM calls rejected by admission control",
+    ["priority", "reason"],
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "Tokens reported by the LLM provider",
+    ["provider", "method", "kind"],
+)
+LLM_ERRORS = Counter(
+    "llm_errors_total",
+    "LLM provider calls that raised",
+    ["provider", "method"],
+)
+LLM_JSON_PARSE_FAILURES = Counter(
+    "llm_json_parse_failures_total",
+    "LLM responses that were not valid JSON",
+    ["method", "recovered"],
+)
+LLM_RETRIES = Counter(
+    "llm_retries_total",
+    "Retries scheduled by tenacity for LLM-backed methods",
+    ["method"],
+)
+
+# Document extraction
+EXTRACTION_DURATION = Histogram(
+    "extraction_duration_seconds",
+    "Time spent extracting text from an uploaded document",
+    ["kind"],
+)
+EXTRACTION_PAGES = Histogram(
+    "extraction_pages",
+    "Pages per extracted PDF",
+    ["kind"],
+    buckets=(1, 2, 3, 5, 10, 20, 50, 100),
+)
+
+# Background jobs
+BACKGROUND_QUEUE_DEPTH = Gauge(
+    "background_jobs_queued",
+    "Background jobs enqueued but not yet started",
+    ["job"],
+    multiprocess_mode="livesum",
+)
+BACKGROUND_JOBS = Counter(
+    "background_jobs_total",
+    "Finished background jobs by outcome",
+    ["job", "outcome"],
+)
+GENERATION_MEMO = Counter(
+    "generation_memo_total",
+    "Generation requests by memo outcome (hit, miss, bypass)",
+    ["outcome"],
+)
+SUGGESTION_CACHE = Counter(
+    "suggestion_cache_total",
+    "Section suggestion requests by store outcome (hit, miss, joined, live)",
+    ["outcome"],
+)
+IDEMPOTENT_REQUESTS = Counter(
+    "idempotent_requests_total",
+    "Requests carrying an Idempotency-Key, by how they were resolved",
+    ["endpoint", "outcome"],
+)
+
+
+# Event loop
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "How late the event loop ran a fixed-interval heartbeat",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+EVENT_LOOP_LAG_QUANTILE = Gauge(
+    "event_loop_lag_quantile_seconds",
+    "Event-loop lag percentiles over the last minute",
+    ["quantile"],
+    multiprocess_mode="livemax",
+)
+EVENT_LOOP_BLOCKS = Counter(
+    "event_loop_blocks_total",
+    "Times a callback held the event loop past the block threshold",
+)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording per-route latency and in-flight requests.
+    Latency stops at the final response body chunk, so BackgroundTasks that run
+    after the response are not billed to the route.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        start = time.perf_counter()
+        status = 500
+        done = False
+        in_flight = HTTP_REQUESTS_IN_FLIGHT.labels(method)
+        in_flight.inc()
+
+        def finish():
+            nonlocal done
+            if done:
+                return
+            done = True
+            in_flight.dec()
+            # Label by route name rather than path: stable across router prefixes
+            # and bounded in cardinality (unmatched paths share one series).
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.labels(
+                method, route.name if route is not None else "unmatched", str(status)
+            ).observe(time.perf_counter() - start)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+            if message["type"] == "http.response.pathsend" or (
+                    message["type"] == "http.response.body" and not message.get("more_body", False)):
+                finish()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            finish()
+
+
+def metrics_response() -> Response:
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        # Under gunicorn: aggregate every worker's metric files
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
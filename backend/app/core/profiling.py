@@ -0,0 +1,234 @@
+import asyncio
+import logging
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.core.serialization import json_dumps
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+SAMPLE_INTERVAL = 0.001  # seconds between profiler samples
+
+
+class Trace:
+    """Spans recorded for one request, relative to its start."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+
+    def add(self, kind: str, detail: str, start: float, end: float) -> None:
+        self.spans.append({
+            "kind": kind,
+            "detail": detail,
+            "start_ms": round((start - self.started) * 1000, 3),
+            "duration_ms": round((end - start) * 1000, 3),
+        })
+
+
+_trace: ContextVar[Optional[Trace]] = ContextVar("profile_trace", default=None)
+
+
+class _Span:
+    __slots__ = ("trace", "kind", "detail", "start")
+
+    def __init__(self, trace: Trace, kind: str, detail: str):
+        self.trace = trace
+        self.kind = kind
+        self.detail = detail
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.trace.add(self.kind, self.detail, self.start, time.perf_counter())
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(kind: str, detail: str = ""):
+    """
+    Time a block as a span of the current request's trace, e.g.
+    `with span("executor", "extract_text"):`. A shared no-op unless the request is traced.
+    """
+    trace = _trace.get()
+    if trace is None:
+        return _NULL_SPAN
+    return _Span(trace, kind, detail)
+
+
+def profiling_enabled() -> bool:
+    return bool(settings.PROFILE_TOKEN or settings.PROFILE_SAMPLE_RATE or settings.PROFILE_SLOW_MS)
+
+
+def instrument_engine(engine) -> None:
+    """Record every SQL statement executed for a traced request as a "db" span."""
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _trace.get() is not None:
+            conn.info.setdefault("profile_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        trace = _trace.get()
+        starts = conn.info.get("profile_query_start")
+        if trace is not None and starts:
+            trace.add("db", statement.split(None, 1)[0].upper() + " " + _statement_table(statement),
+                      starts.pop(), time.perf_counter())
+
+
+_TABLE_RE = re.compile(r"\b(?:FROM|INTO|UPDATE)\s+\"?(\w+)", re.IGNORECASE)
+
+
+def _statement_table(statement: str) -> str:
+    match = _TABLE_RE.search(statement)
+    return match.group(1) if match else ""
+
+
+def _load_profiler():
+    try:
+        from pyinstrument import Profiler
+    except ImportError:
+        logger.warning("pyinstrument is not installed; profiles will contain spans only")
+        return None
+    return Profiler
+
+
+class ProfilingMiddleware:
+    """
+    Per-request profiling, only installed when profiling is configured.
+    A request is profiled (sampling profile + span timeline) when it carries
+    X-Profile: <PROFILE_TOKEN> or is picked at PROFILE_SAMPLE_RATE. With PROFILE_SLOW_MS
+    set, every request records spans and any slower than that is written too.
+    Captures go to PROFILE_DIR, keeping the newest PROFILE_KEEP.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.profiler_class = _load_profiler()
+        # The sampling profiler hooks the thread; only one request is profiled at a time
+        self._profiling = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trigger = None
+        if settings.PROFILE_TOKEN:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER.encode() and value.decode("latin-1") == settings.PROFILE_TOKEN:
+                    trigger = "header"
+                    break
+        if trigger is None and settings.PROFILE_SAMPLE_RATE and random.random() < settings.PROFILE_SAMPLE_RATE:
+            trigger = "sampled"
+        if trigger is None and not settings.PROFILE_SLOW_MS:
+            await self.app(scope, receive, send)
+            return
+
+        capture_id = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:6]}"
+        trace = Trace()
+        token = _trace.set(trace)
+        profiler = None
+        if trigger and self.profiler_class is not None and not self._profiling:
+            self._profiling = True
+            profiler = self.profiler_class(interval=SAMPLE_INTERVAL, async_mode="enabled")
+            profiler.start()
+
+        status = {"code": 500, "response_ms": None}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                if trigger:
+                    message = dict(message, headers=list(message.get("headers", []))
+                                   + [(PROFILE_ID_HEADER, capture_id.encode())])
+            elif (message["type"] == "http.response.body" and not message.get("more_body", False)) \
+                    or message["type"] == "http.response.pathsend":
+                status["response_ms"] = (time.perf_counter() - trace.started) * 1000
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            total_ms = (time.perf_counter() - trace.started) * 1000
+            _trace.reset(token)
+            session = None
+            if profiler is not None:
+                session = profiler.stop()
+                self._profiling = False
+            response_ms = status["response_ms"] if status["response_ms"] is not None else total_ms
+            if trigger is None and response_ms >= settings.PROFILE_SLOW_MS:
+                trigger = "slow"
+            if trigger:
+                record = {
+                    "id": capture_id,
+                    "trigger": trigger,
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status["code"],
+                    "response_ms": round(response_ms, 3),
+                    # Includes BackgroundTasks run after the response was sent
+                    "total_ms": round(total_ms, 3),
+                    "spans": trace.spans,
+                }
+                loop = asyncio.get_event_loop()
+                loop.run_in_executor(None, _write_capture, capture_id, record, session)
+
+
+_write_lock = threading.Lock()
+
+
+def _write_capture(capture_id: str, record: dict, session) -> None:
+    try:
+        os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+        base = os.path.join(settings.PROFILE_DIR, capture_id)
+        if session is not None:
+            from pyinstrument.renderers import HTMLRenderer
+
+            with open(base + ".html", "w") as f:
+                f.write(HTMLRenderer().render(session))
+            record["profile"] = capture_id + ".html"
+        with open(base + ".json", "w") as f:
+            f.write(json_dumps(record))
+        with _write_lock:
+            _trim(settings.PROFILE_DIR, settings.PROFILE_KEEP)
+    except Exception:
+        logger.exception("Failed to write profile %s", capture_id)
+
+
+def _trim(directory: str, keep: int) -> None:
+    """Ring-buffer retention: capture ids sort by time, so drop the oldest beyond keep."""
+    ids = sorted({name.rsplit(".", 1)[0] for name in os.listdir(directory) if name.endswith(".json")})
+    for stale in ids[:max(0, len(ids) - keep)]:
+        for ext in (".json", ".html"):
+            try:
+                os.remove(os.path.join(directory, stale + ext))
+            except FileNotFoundError:
+                pass
@@ -1,18 +1,25 @@
+import asyncio
 from datetime import datetime, timedelta
 from typing import Optional, Union, Any
 from jose import jwt
 from passlib.context import CryptContext
 from app.core.config import settings
+from app.core.profiling import span
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    loop = asyncio.get_running_loop()
+    with span("auth", "bcrypt_verify"):
+        # bcrypt takes tens to hundreds of milliseconds by design, so keep it off the loop
+        return await loop.run_in_executor(None, pwd_context.verify, plain_password, hashed_password)
 
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+async def get_password_hash(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    with span("auth", "bcrypt_hash"):
+        return await loop.run_in_executor(None, pwd_context.hash, password)
 
 
 def create_access_token(subject: Union[str, Any], expires_delta: Optional[timedelta] = None) -> str:
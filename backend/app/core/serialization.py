@@ -0,0 +1,21 @@
+from typing import Any
+import orjson
+from starlette.responses import JSONResponse
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def json_dumps(obj: Any) -> str:
+    """Serializer for SQLAlchemy JSON columns (the engine expects str)."""
+    return orjson.dumps(obj, option=_OPTIONS).decode("utf-8")
+
+
+def json_loads(data: Any) -> Any:
+    return orjson.loads(data)
+
+
+class ORJSONResponse(JSONResponse):
+    """Default response class: orjson renders large resume payloads several times faster."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=_OPTIONS)
@@ -0,0 +1,17 @@
+from uvicorn_worker import UvicornWorker
+
+
+class AppWorker(UvicornWorker):
+    """
+    Uvicorn worker for gunicorn (see gunicorn.conf.py).
+    In-flight requests, including their BackgroundTasks, get graceful_timeout minus
+    a margin to finish. Whatever is still running is then cancelled, which requeues
+    interrupted generations, and the lifespan shutdown flushes before gunicorn's
+    hard kill.
+    """
+
+    SHUTDOWN_MARGIN = 10
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.config.timeout_graceful_shutdown = max(1, self.cfg.graceful_timeout - self.SHUTDOWN_MARGIN)
@@ -0,0 +1,119 @@
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+
+
+class StateBackend(ABC):
+    """
+    Key/value and counter state shared by all workers.
+    Use the in-memory backend for a single process and Redis once there are several.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        """Value of key, or None if absent or expired."""
+
+    @abstractmethod
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        """Set key, expiring after ttl seconds if given."""
+
+    @abstractmethod
+    async def set_nx(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        """Set only if absent. Returns True if this call set it (i.e. acquired it)."""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Remove key (no-op if absent)."""
+
+    @abstractmethod
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        """Atomically add amount; ttl applies when the key is created."""
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryStateBackend(StateBackend):
+    def __init__(self):
+        self._data: Dict[str, Tuple[str, Optional[float]]] = {}
+
+    def _live(self, key: str) -> Optional[str]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires = item
+        if expires is not None and expires <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    @staticmethod
+    def _expiry(ttl: Optional[float]) -> Optional[float]:
+        return time.monotonic() + ttl if ttl else None
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._live(key)
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        self._data[key] = (value, self._expiry(ttl))
+
+    async def set_nx(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        if self._live(key) is not None:
+            return False
+        self._data[key] = (value, self._expiry(ttl))
+        return True
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        current = self._live(key)
+        if current is None:
+            value, expires = amount, self._expiry(ttl)
+        else:
+            value, expires = int(current) + amount, self._data[key][1]
+        self._data[key] = (str(value), expires)
+        return value
+
+
+class RedisStateBackend(StateBackend):
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+
+        self.redis = redis.from_url(url, decode_responses=True)
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self.redis.get(key)
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        await self.redis.set(key, value, px=int(ttl * 1000) if ttl else None)
+
+    async def set_nx(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        return bool(await self.redis.set(key, value, px=int(ttl * 1000) if ttl else None, nx=True))
+
+    async def delete(self, key: str) -> None:
+        await self.redis.delete(key)
+
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        if not ttl:
+            return int(await self.redis.incrby(key, amount))
+        # One MULTI, so the key can't be left without an expiry; NX keeps an existing one
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.incrby(key, amount)
+            pipe.pexpire(key, int(ttl * 1000), nx=True)
+            value, _ = await pipe.execute()
+        return int(value)
+
+    async def close(self) -> None:
+        await self.redis.aclose()
+
+
+def create_state_backend() -> StateBackend:
+    if settings.STATE_BACKEND.lower() == "redis":
+        return RedisStateBackend(settings.REDIS_URL)
+    return MemoryStateBackend()
+
+
+state = create_state_backend()
@@ -1,11 +1,30 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+from brotli_asgi import BrotliMiddleware
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.api import auth, resume, job_roles
-from app.core.db import engine, Base
+from app.core.db import SessionLocal, create_tables, engine
+from app.core.loop_monitor import StrictLoopMiddleware, loop_monitor, loop_monitor_enabled
+from app.core.metrics import MetricsMiddleware, metrics_response
+from app.core.profiling import ProfilingMiddleware, instrument_engine, profiling_enabled
+from app.core.serialization import ORJSONResponse
+from app.core.state import state
+from app.services import jobs
+from app.services.idempotency import purge_expired
+from app.services.ai_service import ai_service
+from app.services.embeddings import embedding_service
+from app.services.renderer import pdf_renderer
+from app.services.scheduler import SchedulerRejected
+from app.services.storage import blob_store
+from app.services.suggestions import run_warmer
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title=settings.PROJECT_NAME,
-              openapi_url=f"{settings.API_V1_STR}/openapi.json")
+              openapi_url=f"{settings.API_V1_STR}/openapi.json",
+              default_response_class=ORJSONResponse)
 
 # CORS
 origins = settings.BACKEND_CORS_ORIGINS
@@ -17,6 +36,21 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Brotli when the client accepts it, gzip otherwise. PDFs and uploaded originals are
+# already compressed and are served with Range support, so they are left alone.
+app.add_middleware(
+    BrotliMiddleware,
+    minimum_size=settings.COMPRESSION_MIN_SIZE,
+    gzip_fallback=True,
+    excluded_handlers=[r".*/pdf$", r".*/original$"],
+)
+app.add_middleware(MetricsMiddleware)
+# Only installed when configured, so it costs nothing otherwise
+if profiling_enabled():
+    instrument_engine(engine)
+    app.add_middleware(ProfilingMiddleware)
+if settings.LOOP_STRICT_MS:
+    app.add_middleware(StrictLoopMiddleware)
 
 # Include Routers
 app.include_router(
@@ -27,13 +61,61 @@ app.include_router(
     job_roles.router, prefix=f"{settings.API_V1_STR}/job-roles", tags=["job-roles"])
 
 
+@app.exception_handler(SchedulerRejected)
+async def scheduler_rejected(request: Request, exc: SchedulerRejected):
+    return ORJSONResponse({"detail": exc.detail}, status_code=exc.status_code,
+                          headers={"Retry-After": str(exc.retry_after)})
+
+
 @app.on_event("startup")
 async def startup():
-    async with engine.begin() as conn:
-        # Create tables if they don't exist
-        await conn.run_sync(Base.metadata.create_all)
+    if loop_monitor_enabled():
+        loop_monitor.start()
+    if settings.CREATE_TABLES:
+        await create_tables()
+    await blob_store.prepare()
+    await pdf_renderer.prepare()
+    await purge_expired()
+    requeued = await resume.resume_queued_generations()
+    if requeued:
+        logger.info("Resumed %d generation(s) requeued at last shutdown", requeued)
+    # Load models and embed any job roles added since the last run without blocking startup
+    asyncio.create_task(ai_service.warm_up())
+    asyncio.create_task(_sync_role_embeddings())
+    app.state.requeue_sweeper = asyncio.create_task(resume.run_requeue_sweeper())
+    if settings.SUGGESTION_WARM_TOP_ROLES:
+        app.state.suggestion_warmer = asyncio.create_task(run_warmer())
+
+
+async def _sync_role_embeddings():
+    try:
+        async with SessionLocal() as db:
+            await embedding_service.sync_job_roles(db)
+    except Exception:
+        logger.exception("Job role embedding sync failed")
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    # The server has stopped accepting connections and drained in-flight requests by now
+    for name in ("requeue_sweeper", "suggestion_warmer"):
+        task = getattr(app.state, name, None)
+        if task is not None:
+            task.cancel()
+    await jobs.drain(settings.SHUTDOWN_DRAIN_TIMEOUT)
+    pdf_renderer.shutdown()
+    await state.close()
+    await engine.dispose()
+    loop_monitor.stop()
+    for handler in logging.getLogger().handlers:
+        handler.flush()
 
 
 @app.get("/")
 def read_root():
     return {"message": "Welcome to AI Resume Maker API"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return metrics_response()
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, JSON
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, JSON, UniqueConstraint, Index
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from app.core.db import Base
+from app.models.types import ZstdJSON, ZstdText
 
 
 class User(Base):
@@ -19,14 +20,28 @@ class User(Base):
     applications = relationship("Application", back_populates="owner")
 
 
+class Blob(Base):
+    __tablename__ = "blobs"
+
+    # Content-addressed upload; shared by every resume with identical bytes
+    sha256 = Column(String(64), primary_key=True)
+    size = Column(Integer)
+    content_type = Column(String)
+    refcount = Column(Integer, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
 class Resume(Base):
     __tablename__ = "resumes"
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
-    file_path = Column(String, nullable=True)
-    parsed_content = Column(JSON, nullable=True)  # Structured data
-    raw_text = Column(Text, nullable=True)
+    file_path = Column(String, nullable=True)  # Blob storage key of the original upload
+    blob_sha256 = Column(String(64), ForeignKey("blobs.sha256"), nullable=True, index=True)
+    original_filename = Column(String, nullable=True)
+    # Large bodies are zstd-compressed; raw_text is only loaded on explicit undefer()
+    parsed_content = Column("parsed_content_zst", ZstdJSON, nullable=True)  # Structured data
+    raw_text = deferred(Column("raw_text_zst", ZstdText, nullable=True))
 
     # New Fields
     template_id = Column(String, default="minimal-pro")
@@ -57,6 +72,11 @@ class JobDescription(Base):
 
 class Application(Base):
     __tablename__ = "applications"
+    __table_args__ = (
+        # Generation memo lookup: same resume version, job text, template and prompts
+        Index("ix_applications_generation_memo",
+              "resume_id", "resume_version", "job_hash", "template_id", "prompt_version"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -73,6 +93,12 @@ class Application(Base):
     status = Column(String, default="pending")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # Inputs the result was generated from; identical inputs reuse a completed result
+    resume_version = Column(Integer, nullable=True)
+    job_hash = Column(String(64), nullable=True)  # sha256 of the job position and text
+    prompt_version = Column(String, nullable=True)  # AI_Service.generation_version
+    revision = Column(Integer, default=0)  # Bumped by each section regeneration
+
     owner = relationship("User", back_populates="applications")
     resume = relationship("Resume", back_populates="applications")
     job = relationship("JobDescription", back_populates="applications")
@@ -86,3 +112,40 @@ class JobRole(Base):
     category = Column(String, index=True)  # e.g. "Tech"
     popularity = Column(Integer, default=0)  # To sort frequent roles
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_key"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    key = Column(String(255))
+    fingerprint = Column(String(64))  # sha256 of the endpoint and request payload
+    status = Column(String, default="in_progress")  # in_progress, completed
+    # Held by the request processing it; renewed while it runs, so a crashed worker's
+    # claim lapses and a retry can take the key over
+    claim_token = Column(String(32), nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    # The first response, replayed verbatim for retries
+    response_code = Column(Integer, nullable=True)
+    response_body = Column(JSON, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), index=True)
+
+
+class SectionSuggestion(Base):
+    __tablename__ = "section_suggestions"
+    __table_args__ = (
+        UniqueConstraint("section_name", "job_role", "experience_level",
+                         name="uq_section_suggestions_key"),
+    )
+
+    # Suggestions for empty sections depend only on these inputs (normalized to lower case)
+    id = Column(Integer, primary_key=True, index=True)
+    section_name = Column(String)
+    job_role = Column(String)
+    experience_level = Column(String)
+    prompt_version = Column(String)  # AI_Service.suggestion_version; stale rows are ignored
+    content = Column(JSON)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,57 @@
+import threading
+from typing import Any, Optional
+import zstandard
+from sqlalchemy.types import LargeBinary, TypeDecorator
+from app.core.config import settings
+from app.core.serialization import json_dumps, json_loads
+
+# zstd (de)compressor objects are not thread-safe; engines may run in executor threads
+_local = threading.local()
+
+
+def compress(data: bytes) -> bytes:
+    compressor = getattr(_local, "compressor", None)
+    if compressor is None:
+        compressor = _local.compressor = zstandard.ZstdCompressor(level=settings.BODY_COMPRESSION_LEVEL)
+    return compressor.compress(data)
+
+
+def decompress(data: bytes) -> bytes:
+    decompressor = getattr(_local, "decompressor", None)
+    if decompressor is None:
+        decompressor = _local.decompressor = zstandard.ZstdDecompressor()
+    return decompressor.decompress(data)
+
+
+class ZstdText(TypeDecorator):
+    """Text stored as zstd-compressed bytes."""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value: Optional[str], dialect) -> Optional[bytes]:
+        if value is None:
+            return None
+        return compress(value.encode("utf-8"))
+
+    def process_result_value(self, value: Optional[bytes], dialect) -> Optional[str]:
+        if value is None:
+            return None
+        return decompress(value).decode("utf-8")
+
+
+class ZstdJSON(TypeDecorator):
+    """JSON document stored as zstd-compressed bytes. Not queryable in SQL."""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value: Any, dialect) -> Optional[bytes]:
+        if value is None:
+            return None
+        return compress(json_dumps(value).encode("utf-8"))
+
+    def process_result_value(self, value: Optional[bytes], dialect) -> Any:
+        if value is None:
+            return None
+        return json_loads(decompress(value))
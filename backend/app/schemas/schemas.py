@@ -109,6 +109,7 @@ class ApplicationCreate(BaseModel):
     resume_id: int
     job_id: int
     template_id: Optional[str] = "modern-ats"
+    regenerate: bool = False  # Skip reuse of an identical earlier generation
 
 
 class ApplicationResponse(BaseModel):
@@ -118,11 +119,23 @@ class ApplicationResponse(BaseModel):
     ats_score: Optional[int] = None
     ats_feedback: Optional[Dict[str, Any]] = None
     template_id: str
+    revision: Optional[int] = 0
     created_at: datetime
 
     class Config:
         from_attributes = True
 
+
+class ApplicationSectionRegenerate(BaseModel):
+    section_name: str  # summary, skills, work_experience, etc.
+    index: Optional[int] = None  # One entry of a list section, e.g. a single job
+    instructions: Optional[str] = None  # e.g. "shorter", "emphasize leadership"
+
+class ResumeMatchResponse(BaseModel):
+    resume_id: int
+    job_id: int
+    score: float  # cosine similarity of resume and JD embeddings, -1..1
+
 # AI Assistant Schemas
 
 
@@ -148,7 +161,7 @@ class JobRoleBase(BaseModel):
 
 
 class JobRoleResponse(JobRoleBase):
-    id: int
+    id: Optional[int] = None  # None for transient AI-suggested roles
 
     class Config:
         from_attributes = True
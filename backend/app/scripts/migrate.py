@@ -0,0 +1,152 @@
+"""
+One-shot schema and data migrations for existing deployments.
+Base.metadata.create_all (run at startup) creates new tables but never alters
+existing ones, so column additions are applied here. Every step is idempotent.
+
+    python -m app.scripts.migrate
+"""
+import asyncio
+import os
+from sqlalchemy import LargeBinary, bindparam, text
+from sqlalchemy.future import select
+from app.core.db import SessionLocal, engine, Base
+from app.core.serialization import json_dumps, json_loads
+from app.models.models import Resume
+from app.models.types import compress
+from app.services.storage import acquire_blob, blob_store
+
+# PostgreSQL DDL; fresh (e.g. SQLite benchmark) databases get these from create_all
+SCHEMA_STATEMENTS = [
+    # Content-addressed uploads
+    "ALTER TABLE resumes ADD COLUMN IF NOT EXISTS blob_sha256 VARCHAR(64) REFERENCES blobs (sha256)",
+    "ALTER TABLE resumes ADD COLUMN IF NOT EXISTS original_filename VARCHAR",
+    "CREATE INDEX IF NOT EXISTS ix_resumes_blob_sha256 ON resumes (blob_sha256)",
+    # Compressed resume bodies (filled by compress_resume_bodies)
+    "ALTER TABLE resumes ADD COLUMN IF NOT EXISTS raw_text_zst BYTEA",
+    "ALTER TABLE resumes ADD COLUMN IF NOT EXISTS parsed_content_zst BYTEA",
+    # Generation memo
+    "ALTER TABLE applications ADD COLUMN IF NOT EXISTS resume_version INTEGER",
+    "ALTER TABLE applications ADD COLUMN IF NOT EXISTS job_hash VARCHAR(64)",
+    "ALTER TABLE applications ADD COLUMN IF NOT EXISTS prompt_version VARCHAR",
+    "CREATE INDEX IF NOT EXISTS ix_applications_generation_memo ON applications"
+    " (resume_id, resume_version, job_hash, template_id, prompt_version)",
+    # Section regeneration
+    "ALTER TABLE applications ADD COLUMN IF NOT EXISTS revision INTEGER DEFAULT 0",
+    # Idempotency key leases
+    "ALTER TABLE idempotency_keys ADD COLUMN IF NOT EXISTS claim_token VARCHAR(32)",
+    "ALTER TABLE idempotency_keys ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP WITH TIME ZONE",
+]
+
+CONTENT_TYPES = {
+    ".pdf": "application/pdf",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
+
+async def migrate_schema():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        if conn.dialect.name != "postgresql":
+            return
+        for statement in SCHEMA_STATEMENTS:
+            await conn.execute(text(statement))
+    print(f"Applied {len(SCHEMA_STATEMENTS)} schema statements.")
+
+
+async def backfill_blobs(batch_size: int = 100):
+    """
+    Copy legacy uploads/{user_id}_{filename} files into the blob store and point their
+    resumes at the blobs. The legacy files are left in place; delete them by hand once
+    the migrated downloads check out.
+    """
+    copied = 0
+    last_id = 0
+    while True:
+        async with SessionLocal() as db:
+            result = await db.execute(
+                select(Resume)
+                .where(Resume.id > last_id, Resume.blob_sha256.is_(None), Resume.file_path.isnot(None))
+                .order_by(Resume.id).limit(batch_size))
+            resumes = result.scalars().all()
+            if not resumes:
+                break
+            for resume in resumes:
+                last_id = resume.id
+                legacy_path = resume.file_path
+                if not os.path.isfile(legacy_path):
+                    continue
+                async with blob_store.ingest_path(legacy_path) as blob:
+                    ext = os.path.splitext(legacy_path)[1].lower()
+                    await acquire_blob(db, blob, CONTENT_TYPES.get(ext, "application/octet-stream"))
+                resume.blob_sha256 = blob.sha256
+                resume.file_path = blob_store.key_for(blob.sha256)
+                resume.original_filename = os.path.basename(legacy_path).split("_", 1)[-1]
+                copied += 1
+            await db.commit()
+    print(f"Copied {copied} legacy uploads into the blob store; the original files were left in place.")
+
+
+async def _column_exists(conn, table: str, column: str) -> bool:
+    result = await conn.execute(text(
+        "SELECT 1 FROM information_schema.columns WHERE table_name = :t AND column_name = :c"
+    ), {"t": table, "c": column})
+    return result.first() is not None
+
+
+async def compress_resume_bodies(batch_size: int = 500):
+    """
+    Copy legacy inline resumes.raw_text / parsed_content into their zstd columns in
+    id-ordered batches, then drop the inline columns.
+    """
+    async with engine.connect() as conn:
+        if conn.dialect.name != "postgresql" or not await _column_exists(conn, "resumes", "raw_text"):
+            return
+        before = (await conn.execute(text(
+            "SELECT coalesce(sum(pg_column_size(raw_text)), 0)"
+            " + coalesce(sum(pg_column_size(parsed_content)), 0) FROM resumes"))).scalar()
+
+    update_stmt = text(
+        "UPDATE resumes SET raw_text_zst = :raw, parsed_content_zst = :parsed WHERE id = :rid"
+    ).bindparams(bindparam("raw", type_=LargeBinary), bindparam("parsed", type_=LargeBinary))
+    converted = 0
+    last_id = 0
+    while True:
+        async with engine.begin() as conn:
+            rows = (await conn.execute(text(
+                "SELECT id, raw_text, parsed_content::text FROM resumes "
+                "WHERE id > :last AND raw_text_zst IS NULL AND parsed_content_zst IS NULL "
+                "ORDER BY id LIMIT :n"
+            ), {"last": last_id, "n": batch_size})).all()
+            if not rows:
+                break
+            params = []
+            for rid, raw_text, parsed_json in rows:
+                params.append({
+                    "rid": rid,
+                    "raw": compress(raw_text.encode("utf-8")) if raw_text is not None else None,
+                    # Re-serialize so stored bytes match what ZstdJSON writes
+                    "parsed": compress(json_dumps(json_loads(parsed_json)).encode("utf-8"))
+                    if parsed_json is not None else None,
+                })
+            await conn.execute(update_stmt, params)
+            last_id = rows[-1][0]
+            converted += len(rows)
+        print(f"Compressed {converted} resume rows...")
+
+    async with engine.begin() as conn:
+        after = (await conn.execute(text(
+            "SELECT coalesce(sum(pg_column_size(raw_text_zst)), 0)"
+            " + coalesce(sum(pg_column_size(parsed_content_zst)), 0) FROM resumes"))).scalar()
+        await conn.execute(text("ALTER TABLE resumes DROP COLUMN raw_text, DROP COLUMN parsed_content"))
+    print(f"Compressed {converted} resumes; body bytes {before} -> {after}. "
+          "Run VACUUM FULL resumes to return the dropped columns' space to the OS.")
+
+
+async def migrate():
+    await migrate_schema()
+    await compress_resume_bodies()
+    await backfill_blobs()
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
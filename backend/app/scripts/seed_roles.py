@@ -2,6 +2,7 @@ import asyncio
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.db import SessionLocal, engine, Base
 from app.models.models import JobRole
+from app.services.embeddings import embedding_service
 
 ROLES = [
     # Tech
@@ -56,7 +57,8 @@ async def seed():
             role = JobRole(name=name, category=category, popularity=popularity)
             session.add(role)
         await session.commit()
-    print(f"Seeded {len(expanded_roles)} job roles.")
+        added = await embedding_service.sync_job_roles(session)
+    print(f"Seeded {len(expanded_roles)} job roles ({added} embedded).")
 
 if __name__ == "__main__":
     asyncio.run(seed())
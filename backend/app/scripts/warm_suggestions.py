@@ -0,0 +1,21 @@
+"""
+Precompute section suggestions now, ignoring the off-peak window.
+
+    python -m app.scripts.warm_suggestions [TOP_ROLES]
+"""
+import asyncio
+import sys
+from app.core.config import settings
+from app.core.db import engine, Base
+from app.services.suggestions import warm
+
+
+async def main(top_roles: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    warmed = await warm(top_roles, respect_window=False)
+    print(f"Warmed {warmed} section suggestion entries for the top {top_roles} roles.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else settings.SUGGESTION_WARM_TOP_ROLES))
@@ -1,85 +1,30 @@
-from typing import Any
+from typing import Any, Dict, List, Optional
 import google.generativeai as genai
 import ollama
 from app.core.config import settings
+from app.services.stub_provider import StubProvider
+from app.services.scheduler import SchedulerRejected, estimate_tokens, scheduler
+from app.core.profiling import span
+from app.core.metrics import (
+    LLM_ERRORS, LLM_JSON_PARSE_FAILURES, LLM_MODEL_LATENCY, LLM_MODEL_LOAD_DURATION,
+    LLM_REQUEST_DURATION, LLM_RETRIES, LLM_TOKENS
+)
+import hashlib
 import json
+import time
 import asyncio
-from tenacity import retry, stop_after_attempt, wait_exponential
+import logging
+from tenacity import retry, retry_if_not_exception_type, stop_after_attempt, wait_exponential
 
+logger = logging.getLogger(__name__)
 
-class AI_Service:
-    def __init__(self):
-        self.provider = settings.AI_PROVIDER.lower()
-        if self.provider == "gemini":
-            if settings.GEMINI_API_KEY:
-                genai.configure(api_key=settings.GEMINI_API_KEY)
-                self.gemini_model = genai.GenerativeModel('gemini-pro')
-            else:
-                print(
-                    "WARNING: GEMINI_API_KEY is missing. Falling back to Ollama if configured.")
-                self.provider = "ollama"
-
-        if self.provider == "ollama":
-            self.ollama_client = ollama.AsyncClient(host=settings.OLLAMA_HOST)
-            self.model_name = settings.AI_MODEL
-
-    async def _generate_content(self, prompt: str) -> str:
-        if self.provider == "gemini":
-            response = await self.gemini_model.generate_content_async(prompt)
-            return response.text
-        else:
-            # Ollama implementation
-            response = await self.ollama_client.generate(
-                model=self.model_name,
-                prompt=prompt,
-                stream=False
-            )
-            return response['response']
-
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-    async def parse_resume(self, text: str) -> dict:
-        prompt = f"""
-        Extract the following information from the resume text below and return it as a VALID JSON object.
-        Fields to extract:
-        - full_name
-        - email
-        - phone
-        - skills (list of strings)
-        - work_experience (list of objects with company, role, duration, description)
-        - education (list of objects with institution, degree, year)
-        - projects (list of objects)
-        
-        Resume Text:
-        {text[:10000]}
-        """
-        response_text = await self._generate_content(prompt)
-        return self._clean_and_parse_json(response_text)
-
-    def _clean_and_parse_json(self, text: str) -> dict:
-        clean_text = text.replace('```json', '').replace('```', '').strip()
-        try:
-            return json.loads(clean_text)
-        except json.JSONDecodeError:
-            # Fallback parsing
-            print(f"JSON Parse Error. Trying to extract block...")
-            if "{" in text and "}" in text:
-                start = text.find("{")
-                end = text.rfind("}") + 1
-                try:
-                    return json.loads(text[start:end])
-                except:
-                    pass
-            return {"raw_text": text, "error": "Failed to parse JSON"}
-
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-    async def get_section_suggestions(self, section_name: str, job_role: str, experience_level: str, current_content: Any = None) -> dict:
-        prompt = f"""
+SUGGESTION_PROMPT = """
         You are a Principal Career Coach and Expert Resume Writer.
         Provide suggestions and improved content for the '{section_name}' section of a resume.
         
         Target Role: {job_role}
         Experience Level: {experience_level}
-        Current Content: {json.dumps(current_content) if current_content else 'None'}
+        Current Content: {current_content}
         
         INSTRUCTIONS:
         1. Provide 3-5 specific bullet point suggestions or phrases.
@@ -93,22 +38,16 @@ class AI_Service:
             "improved_content": "..." 
         }}
         """
-        response_text = await self._generate_content(prompt)
-        return self._clean_and_parse_json(response_text)
 
-    async def generate_tailored_resume(self, resume_json: dict, job_description: str, job_role: str, template_id: str = "minimal-pro") -> dict:
-        resume_str = json.dumps(resume_json)
+# Density/tone of the tailored resume per template
+DEFAULT_DENSITY = "Concise and impact-focused"
+TEMPLATE_DENSITY = {
+    "leadership-edge": "Achievement-focused, executive tone, emphasis on ROI and leadership.",
+    "tech-focused": "Densely packed with technical stack details, specific tools, and architectural impact.",
+    "academic": "Detailed, formal, focusing on publications and research methodology.",
+}
 
-        # Adjust density/tone based on template
-        density_instruction = "Concise and impact-focused"
-        if template_id == 'leadership-edge':
-            density_instruction = "Achievement-focused, executive tone, emphasis on ROI and leadership."
-        elif template_id == 'tech-focused':
-            density_instruction = "Densely packed with technical stack details, specific tools, and architectural impact."
-        elif template_id == 'academic':
-            density_instruction = "Detailed, formal, focusing on publications and research methodology."
-
-        prompt = f"""
+TAILOR_PROMPT = """
         You are an Elite Career Consultant. 
         Rewrite the candidate's profile for the Role: {job_role}.
         Target Style: {template_id} ({density_instruction})
@@ -142,11 +81,8 @@ class AI_Service:
             "projects": [...]
         }}
         """
-        response_text = await self._generate_content(prompt)
-        return self._clean_and_parse_json(response_text)
 
-    async def calculate_ats_score(self, resume_text: str, job_description: str) -> dict:
-        prompt = f"""
+ATS_PROMPT = """
         Evaluate the resume against the Job Description.
         JD: {job_description}
         Resume: {resume_text}
@@ -160,8 +96,289 @@ class AI_Service:
             "improvement_tips": [...]
         }}
         """
-        response_text = await self._generate_content(prompt)
-        return self._clean_and_parse_json(response_text)
+
+SECTION_PROMPT = """
+        You are an Elite Career Consultant.
+        Rewrite ONLY the '{section_name}' section of a resume tailored for the Role: {job_role}.
+
+        Key job requirements: {keywords}
+        Current version: {current_content}
+        Candidate source data: {source_content}
+        {instructions}
+
+        RULES:
+        1. Keep every fact grounded in the source data; never invent employers, dates or degrees.
+        2. Work in the key requirements where they are truthful.
+        3. Action verbs, quantified results.
+        4. Keep the same structure as the current version.
+
+        OUTPUT FORMAT: Valid JSON only.
+        {{"content": <the rewritten section>}}
+        """
+
+
+def _prompt_hash(*parts: str) -> str:
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()[:12]
+
+
+# Any edit to these prompts changes the hash, so memoized generations and stored
+# suggestions made with older prompts stop being reused (see *.prompt_version).
+# Section rewrites are not reused; their version tags unusable-output warnings.
+GENERATION_PROMPT_HASH = _prompt_hash(
+    TAILOR_PROMPT, DEFAULT_DENSITY, json.dumps(TEMPLATE_DENSITY, sort_keys=True), ATS_PROMPT)
+SUGGESTION_PROMPT_HASH = _prompt_hash(SUGGESTION_PROMPT)
+SECTION_PROMPT_HASH = _prompt_hash(SECTION_PROMPT)
+
+# Worst-case prompt + completion tokens per method; sizes each model's num_ctx
+METHOD_TOKEN_BUDGETS = {
+    "suggest_job_roles": 512,
+    "get_section_suggestions": 2048,
+    "regenerate_section": 3072,
+    "calculate_ats_score": 4096,
+    "parse_resume": 4096,  # Resume text is cut at 10k chars
+    "generate_tailored_resume": 6144,
+}
+# num_ctx is rounded up to one of these: Ollama reloads a model whenever num_ctx changes
+CONTEXT_BUCKETS = (2048, 4096, 8192, 16384, 32768)
+COMPLETION_RESERVE = 1024  # tokens kept free for the answer when sizing an oversized prompt
+# load_duration above this means the call loaded the model rather than finding it resident
+COLD_LOAD_THRESHOLD = 0.25  # seconds
+
+
+def _context_bucket(tokens: int) -> int:
+    for size in CONTEXT_BUCKETS:
+        if tokens <= size:
+            return min(size, settings.OLLAMA_MAX_CTX)
+    return settings.OLLAMA_MAX_CTX
+
+
+def parse_failed(result: Any) -> bool:
+    """True for the placeholder _clean_and_parse_json returns when the reply wasn't JSON."""
+    return isinstance(result, dict) and "error" in result
+
+
+def _count_retry(retry_state) -> None:
+    LLM_RETRIES.labels(retry_state.fn.__name__).inc()
+
+
+class AI_Service:
+    def __init__(self):
+        self.provider = settings.AI_PROVIDER.lower()
+        if self.provider == "gemini":
+            if settings.GEMINI_API_KEY:
+                genai.configure(api_key=settings.GEMINI_API_KEY)
+                self.gemini_model = genai.GenerativeModel('gemini-pro')
+                self.model_name = "gemini-pro"
+            else:
+                logger.warning(
+                    "GEMINI_API_KEY is missing. Falling back to Ollama if configured.")
+                self.provider = "ollama"
+
+        if self.provider == "stub":
+            self.stub = StubProvider(
+                latency_ms=settings.STUB_LATENCY_MS,
+                jitter_ms=settings.STUB_JITTER_MS,
+                failure_rate=settings.STUB_FAILURE_RATE,
+                seed=settings.STUB_SEED,
+            )
+            self.model_name = "stub"
+
+        if self.provider == "ollama":
+            self.ollama_client = ollama.AsyncClient(host=settings.OLLAMA_HOST)
+            self.model_name = settings.AI_MODEL
+            # One fixed num_ctx per model, large enough for every method routed to it
+            self.model_contexts: Dict[str, int] = {}
+            for method, budget in METHOD_TOKEN_BUDGETS.items():
+                model = self.model_for(method)
+                self.model_contexts[model] = max(self.model_contexts.get(model, 0), _context_bucket(budget))
+            self.model_contexts.setdefault(self.model_name, _context_bucket(max(METHOD_TOKEN_BUDGETS.values())))
+
+    def model_for(self, method: str) -> str:
+        if self.provider == "ollama":
+            return settings.AI_MODEL_ROUTES.get(method, self.model_name)
+        return self.model_name
+
+    @property
+    def generation_version(self) -> str:
+        """Identifies the prompts and models that produce a tailored resume and its ATS score."""
+        return (f"{GENERATION_PROMPT_HASH}:{self.provider}:{self.model_for('generate_tailored_resume')}"
+                f":{self.model_for('calculate_ats_score')}")
+
+    @property
+    def suggestion_version(self) -> str:
+        return f"{SUGGESTION_PROMPT_HASH}:{self.provider}:{self.model_for('get_section_suggestions')}"
+
+    @property
+    def section_version(self) -> str:
+        return f"{SECTION_PROMPT_HASH}:{self.provider}:{self.model_for('regenerate_section')}"
+
+    def _context_size(self, model: str, prompt: str) -> int:
+        num_ctx = self.model_contexts.get(model) or _context_bucket(max(METHOD_TOKEN_BUDGETS.values()))
+        needed = len(prompt) // 4 + COMPLETION_RESERVE
+        if needed > num_ctx:
+            # Over budget: a reload beats Ollama silently truncating the prompt
+            logger.warning("Prompt of ~%d tokens exceeds num_ctx %d for %s", needed, num_ctx, model)
+            num_ctx = _context_bucket(needed)
+        return num_ctx
+
+    def _record_load(self, model: str, response: Any) -> str:
+        """Classify a call as a cold or warm start from Ollama's reported load time."""
+        load_seconds = (response.get('load_duration') or 0) / 1e9
+        if load_seconds >= COLD_LOAD_THRESHOLD:
+            LLM_MODEL_LOAD_DURATION.labels(model).observe(load_seconds)
+            return "cold"
+        return "warm"
+
+    async def warm_up(self) -> None:
+        """Load every routed model with its num_ctx and keep_alive so first requests start warm."""
+        if self.provider != "ollama" or not settings.OLLAMA_PRELOAD:
+            return
+        for model, num_ctx in self.model_contexts.items():
+            start = time.perf_counter()
+            try:
+                # An empty prompt only loads the model
+                response = await self.ollama_client.generate(
+                    model=model, prompt="", keep_alive=settings.OLLAMA_KEEP_ALIVE,
+                    options={"num_ctx": num_ctx})
+            except Exception:
+                logger.warning("Could not preload model %s", model, exc_info=True)
+                continue
+            self._record_load(model, response)
+            logger.info("Preloaded %s (num_ctx=%d) in %.1fs", model, num_ctx, time.perf_counter() - start)
+
+    async def _generate_content(self, prompt: str, method: str = "unknown") -> str:
+        # Fair-share admission: waits for a slot, or raises SchedulerRejected
+        async with scheduler.slot(estimate_tokens(prompt)) as ticket:
+            start = time.perf_counter()
+            with span("provider", f"{self.provider}:{method}"):
+                try:
+                    if self.provider == "gemini":
+                        response = await self.gemini_model.generate_content_async(prompt)
+                        usage = getattr(response, "usage_metadata", None)
+                        prompt_tokens = getattr(usage, "prompt_token_count", 0)
+                        completion_tokens = getattr(usage, "candidates_token_count", 0)
+                        text = response.text
+                    elif self.provider == "stub":
+                        text = await self.stub.generate(prompt, method)
+                        # Rough 4-chars-per-token estimate so token metrics stay meaningful offline
+                        prompt_tokens = len(prompt) // 4
+                        completion_tokens = len(text) // 4
+                    else:
+                        # Ollama implementation
+                        model = self.model_for(method)
+                        response = await self.ollama_client.generate(
+                            model=model,
+                            prompt=prompt,
+                            stream=False,
+                            keep_alive=settings.OLLAMA_KEEP_ALIVE,
+                            options={"num_ctx": self._context_size(model, prompt)}
+                        )
+                        LLM_MODEL_LATENCY.labels(model, method, self._record_load(model, response)).observe(
+                            time.perf_counter() - start)
+                        prompt_tokens = response.get('prompt_eval_count')
+                        completion_tokens = response.get('eval_count')
+                        text = response['response']
+                except Exception:
+                    LLM_ERRORS.labels(self.provider, method).inc()
+                    raise
+                finally:
+                    LLM_REQUEST_DURATION.labels(self.provider, method).observe(
+                        time.perf_counter() - start)
+
+        if prompt_tokens:
+            LLM_TOKENS.labels(self.provider, method, "prompt").inc(prompt_tokens)
+        if completion_tokens:
+            LLM_TOKENS.labels(self.provider, method, "completion").inc(completion_tokens)
+        await ticket.settle((prompt_tokens or 0) + (completion_tokens or 0))
+        return text
+
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10),
+           retry=retry_if_not_exception_type(SchedulerRejected), before_sleep=_count_retry)
+    async def parse_resume(self, text: str) -> dict:
+        prompt = f"""
+        Extract the following information from the resume text below and return it as a VALID JSON object.
+        Fields to extract:
+        - full_name
+        - email
+        - phone
+        - skills (list of strings)
+        - work_experience (list of objects with company, role, duration, description)
+        - education (list of objects with institution, degree, year)
+        - projects (list of objects)
+        
+        Resume Text:
+        {text[:10000]}
+        """
+        response_text = await self._generate_content(prompt, method="parse_resume")
+        return self._clean_and_parse_json(response_text, method="parse_resume")
+
+    def _clean_and_parse_json(self, text: str, method: str = "unknown") -> dict:
+        clean_text = text.replace('```json', '').replace('```', '').strip()
+        try:
+            return json.loads(clean_text)
+        except json.JSONDecodeError:
+            # Fallback parsing
+            logger.warning("JSON parse error in %s. Trying to extract block...", method)
+            if "{" in text and "}" in text:
+                start = text.find("{")
+                end = text.rfind("}") + 1
+                try:
+                    result = json.loads(text[start:end])
+                    LLM_JSON_PARSE_FAILURES.labels(method, "true").inc()
+                    return result
+                except:
+                    pass
+            LLM_JSON_PARSE_FAILURES.labels(method, "false").inc()
+            return {"raw_text": text, "error": "Failed to parse JSON"}
+
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10),
+           retry=retry_if_not_exception_type(SchedulerRejected), before_sleep=_count_retry)
+    async def get_section_suggestions(self, section_name: str, job_role: str, experience_level: str, current_content: Any = None) -> dict:
+        prompt = SUGGESTION_PROMPT.format(
+            section_name=section_name,
+            job_role=job_role,
+            experience_level=experience_level,
+            current_content=json.dumps(current_content) if current_content else 'None',
+        )
+        response_text = await self._generate_content(prompt, method="get_section_suggestions")
+        return self._clean_and_parse_json(response_text, method="get_section_suggestions")
+
+    async def generate_tailored_resume(self, resume_json: dict, job_description: str, job_role: str, template_id: str = "minimal-pro") -> dict:
+        # Adjust density/tone based on template
+        density_instruction = TEMPLATE_DENSITY.get(template_id, DEFAULT_DENSITY)
+        prompt = TAILOR_PROMPT.format(
+            job_role=job_role,
+            template_id=template_id,
+            density_instruction=density_instruction,
+            job_description=job_description,
+            resume_str=json.dumps(resume_json),
+        )
+        response_text = await self._generate_content(prompt, method="generate_tailored_resume")
+        return self._clean_and_parse_json(response_text, method="generate_tailored_resume")
+
+    # Unusable output (ValueError) is not retried: the caller reports it as a bad gateway
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10),
+           retry=retry_if_not_exception_type((SchedulerRejected, ValueError)), before_sleep=_count_retry)
+    async def regenerate_section(self, section_name: str, current_content: Any, source_content: Any,
+                                 keywords: List[str], job_role: str, instructions: Optional[str] = None) -> Any:
+        """
+        Rewrite one section of a tailored resume; only that section and its sources are sent.
+        Raises ValueError when the model's reply has no usable content.
+        """
+        prompt = SECTION_PROMPT.format(
+            section_name=section_name, job_role=job_role, keywords=", ".join(keywords),
+            current_content=json.dumps(current_content), source_content=json.dumps(source_content),
+            instructions=f"User request: {instructions}" if instructions else "")
+        response_text = await self._generate_content(prompt, method="regenerate_section")
+        result = self._clean_and_parse_json(response_text, method="regenerate_section")
+        if not isinstance(result, dict) or "content" not in result:
+            raise ValueError("Section regeneration returned no content")
+        return result["content"]
+
+    async def calculate_ats_score(self, resume_text: str, job_description: str) -> dict:
+        prompt = ATS_PROMPT.format(job_description=job_description, resume_text=resume_text)
+        response_text = await self._generate_content(prompt, method="calculate_ats_score")
+        return self._clean_and_parse_json(response_text, method="calculate_ats_score")
 
     async def suggest_job_roles(self, query: str) -> List[str]:
         prompt = f"""
@@ -171,9 +388,9 @@ class AI_Service:
         Return ONLY a JSON list of strings.
         Example: ["Software Engineer", "Software Architect", "Full Stack Developer"]
         """
-        response_text = await self._generate_content(prompt)
+        response_text = await self._generate_content(prompt, method="suggest_job_roles")
         try:
-            suggestions = self._clean_and_parse_json(response_text)
+            suggestions = self._clean_and_parse_json(response_text, method="suggest_job_roles")
             if isinstance(suggestions, list):
                 return suggestions
             return []
@@ -0,0 +1,102 @@
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+# Local keyword-coverage scoring, used to rescore a single regenerated section without
+# sending the whole resume back to the LLM. The full LLM ATS score stays the baseline.
+
+MAX_KEYWORDS = 25
+# Score points per percentage point of keyword coverage gained or lost since the baseline
+COVERAGE_WEIGHT = 0.5
+
+_WORD_RE = re.compile(r"[a-z][a-z0-9+#]*(?:[.\-][a-z0-9+#]+)*")
+STOPWORDS = frozenset("""
+a about above after all also an and any are as at be been being both but by can could did do
+does doing during each etc for from further had has have having how if in including into is it
+its itself just may more most must no nor not of off on once only or other our out over own per
+plus same should so some such than that the their them then there these they this those through
+to too under until up very via was we well were what when where which while who whom why will
+with within without would you your able ability across work working experience years year team
+teams strong skills skill role job candidate candidates knowledge understanding responsibilities
+requirements required preferred qualifications including new using use based good great excellent
+""".split())
+
+
+def _tokens(text: str) -> List[str]:
+    return _WORD_RE.findall(text.lower())
+
+
+def flatten(value: Any) -> str:
+    """All text in a (possibly nested) section value."""
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, dict):
+        return " ".join(flatten(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return " ".join(flatten(v) for v in value)
+    return str(value)
+
+
+def extract_keywords(job_text: str, limit: int = MAX_KEYWORDS) -> List[str]:
+    """Most frequent meaningful terms in a job description."""
+    counts = Counter(t for t in _tokens(job_text) if t not in STOPWORDS and len(t) > 2)
+    return [term for term, _ in counts.most_common(limit)]
+
+
+def matched_keywords(value: Any, keywords: List[str]) -> List[str]:
+    present: Set[str] = set(_tokens(flatten(value)))
+    return [k for k in keywords if k in present]
+
+
+def ensure_baseline(feedback: Optional[Dict[str, Any]], content: Dict[str, Any],
+                    job_text: str, score: Optional[int]) -> Dict[str, Any]:
+    """
+    Attach per-section keyword matches for the current content to the ATS feedback.
+    Computed once per application, on its first section rescore.
+    """
+    feedback = dict(feedback or {})
+    if "section_keywords" in feedback:
+        return feedback
+    keywords = extract_keywords(job_text)
+    sections = {name: matched_keywords(value, keywords) for name, value in content.items()}
+    feedback["jd_keywords"] = keywords
+    feedback["section_keywords"] = sections
+    feedback["base_score"] = score or 0
+    feedback["base_coverage"] = _coverage(sections, keywords)
+    return feedback
+
+
+def rescore_section(feedback: Dict[str, Any], section: str, value: Any) -> Tuple[int, Dict[str, Any]]:
+    """
+    Rescan only the changed section, then derive the overall score from the baseline
+    LLM score adjusted by the change in keyword coverage. feedback must have a baseline.
+    """
+    feedback = dict(feedback)
+    keywords = feedback["jd_keywords"]
+    sections = dict(feedback["section_keywords"])
+    sections[section] = matched_keywords(value, keywords)
+    feedback["section_keywords"] = sections
+
+    coverage = _coverage(sections, keywords)
+    delta = (coverage - feedback["base_coverage"]) * 100 * COVERAGE_WEIGHT
+    score = max(0, min(100, round(feedback["base_score"] + delta)))
+
+    covered = {k for matched in sections.values() for k in matched}
+    feedback["score"] = score
+    feedback["match_percentage"] = round(coverage * 100)
+    feedback["missing_keywords"] = [k for k in feedback.get("missing_keywords") or []
+                                    if not isinstance(k, str) or k.lower() not in covered]
+    feedback["section_scores"] = {
+        name: round(len(matched) / len(keywords) * 100) if keywords else 0
+        for name, matched in sections.items()
+    }
+    return score, feedback
+
+
+def _coverage(sections: Dict[str, List[str]], keywords: List[str]) -> float:
+    if not keywords:
+        return 0.0
+    covered = {k for matched in sections.values() for k in matched}
+    return len(covered) / len(keywords)
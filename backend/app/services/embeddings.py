@@ -0,0 +1,269 @@
+import asyncio
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import re
+import zlib
+from collections import OrderedDict
+from typing import FrozenSet, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import ollama
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.config import settings
+from app.models.models import JobRole
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"[a-z0-9+#]+")
+
+
+def _data_size(rows: int, dim: Optional[int]) -> int:
+    return rows * (dim or 0) * np.dtype(np.float32).itemsize
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+class HashingEmbedder:
+    """
+    Deterministic offline embedder (EMBEDDING_PROVIDER=stub).
+    Hashes words and character trigrams into a fixed-size vector, which is enough
+    for typo- and prefix-tolerant job title matching without a model.
+    """
+
+    name = "hashing-v1"
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+
+    def _embed_one(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in _TOKEN_RE.findall(text.lower()):
+            features = [word] + [f"^{word}$"[i:i + 3] for i in range(len(word))]
+            for feature in features:
+                h = zlib.crc32(feature.encode("utf-8"))
+                vector[h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        return vector
+
+    async def embed(self, texts: Sequence[str]) -> np.ndarray:
+        loop = asyncio.get_event_loop()
+        rows = await loop.run_in_executor(None, lambda: [self._embed_one(t) for t in texts])
+        return _normalize(np.vstack(rows))
+
+
+class OllamaEmbedder:
+    def __init__(self, model: str):
+        self.name = model
+        self.client = ollama.AsyncClient(host=settings.OLLAMA_HOST)
+
+    async def embed(self, texts: Sequence[str]) -> np.ndarray:
+        response = await self.client.embed(model=self.name, input=list(texts))
+        return _normalize(np.asarray(response["embeddings"], dtype=np.float32))
+
+
+class _Rows(NamedTuple):
+    """One consistent view of a VectorIndex, replaced as a whole and never mutated."""
+
+    ids: List[int]
+    labels: List[str]
+    dim: Optional[int]
+    id_set: FrozenSet[int]
+    matrix: Optional[np.ndarray]
+    meta_mtime: Optional[float]
+
+
+_NO_ROWS = _Rows([], [], None, frozenset(), None, None)
+
+
+class VectorIndex:
+    """
+    Append-only float32 matrix on disk (<name>.f32) plus a JSON sidecar with ids/labels.
+    Rows are L2-normalized, so a dot product is the cosine similarity. The matrix is
+    memory-mapped and re-mapped when another process appends to it.
+    Appends build the new view in the executor and swap it in on the loop, so a search
+    never sees ids from one view and the matrix from another.
+    """
+
+    def __init__(self, directory: str, name: str, model: str):
+        self.model = model
+        self.data_path = os.path.join(directory, f"{name}.f32")
+        self.meta_path = os.path.join(directory, f"{name}.json")
+        self.lock_path = os.path.join(directory, f"{name}.lock")
+        os.makedirs(directory, exist_ok=True)
+        self._rows = self._load()
+
+    def __len__(self) -> int:
+        return len(self._rows.ids)
+
+    @property
+    def ids(self) -> List[int]:
+        return self._rows.ids
+
+    @property
+    def dim(self) -> Optional[int]:
+        return self._rows.dim
+
+    def _load(self) -> _Rows:
+        try:
+            meta_mtime = os.stat(self.meta_path).st_mtime
+            with open(self.meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return _NO_ROWS
+        if meta.get("model") != self.model:
+            # Vectors from a different model are not comparable; rebuild from scratch
+            logger.info("Embedding model changed (%s -> %s), resetting %s",
+                        meta.get("model"), self.model, self.meta_path)
+            return self._reset()
+        ids, labels, dim = meta["ids"], meta["labels"], meta["dim"]
+        try:
+            size = os.path.getsize(self.data_path)
+        except OSError:
+            size = 0
+        if size < _data_size(len(ids), dim):
+            # The sidecar lists more rows than the matrix holds; nothing can be trusted
+            logger.warning("Vector data %s is shorter than its index, resetting", self.data_path)
+            return self._reset()
+        matrix = np.memmap(self.data_path, dtype=np.float32, mode="r",
+                           shape=(len(ids), dim)) if ids else None
+        return _Rows(ids, labels, dim, frozenset(ids), matrix, meta_mtime)
+
+    def _reset(self) -> _Rows:
+        for path in (self.data_path, self.meta_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return _NO_ROWS
+
+    def refresh(self):
+        """Re-map if a sibling worker appended since we last looked."""
+        try:
+            mtime = os.stat(self.meta_path).st_mtime
+        except OSError:
+            return
+        if mtime != self._rows.meta_mtime:
+            self._rows = self._load()
+
+    def missing(self, ids: Sequence[int]) -> List[int]:
+        id_set = self._rows.id_set
+        return [i for i in ids if i not in id_set]
+
+    async def add(self, ids: Sequence[int], labels: Sequence[str], vectors: np.ndarray):
+        # The file lock can wait on another worker, and the writes are blocking
+        loop = asyncio.get_event_loop()
+        self._rows = await loop.run_in_executor(None, self._add_sync, ids, labels, vectors)
+
+    def _add_sync(self, ids: Sequence[int], labels: Sequence[str], vectors: np.ndarray) -> _Rows:
+        with open(self.lock_path, "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            # Another worker may have appended; build on what is on disk now
+            rows = self._load()
+            keep = [n for n, i in enumerate(ids) if i not in rows.id_set]
+            if not keep:
+                return rows
+            vectors = np.ascontiguousarray(vectors[keep], dtype=np.float32)
+            dim = rows.dim if rows.dim is not None else int(vectors.shape[1])
+            with open(self.data_path, "ab") as f:
+                # Drop rows a crashed append wrote without recording them in the sidecar,
+                # so the new rows line up with their ids
+                f.truncate(_data_size(len(rows.ids), dim))
+                f.write(vectors.tobytes())
+            tmp = f"{self.meta_path}.tmp"
+            with open(tmp, "w") as f:
+                json.dump({"model": self.model, "dim": dim,
+                           "ids": rows.ids + [ids[n] for n in keep],
+                           "labels": rows.labels + [labels[n] for n in keep]}, f)
+            os.replace(tmp, self.meta_path)
+            return self._load()
+
+    def search(self, query: np.ndarray, k: int, min_score: float = -1.0) -> List[Tuple[int, str, float]]:
+        rows = self._rows
+        if rows.matrix is None or not rows.ids:
+            return []
+        scores = rows.matrix @ query
+        k = min(k, len(rows.ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(rows.ids[i], rows.labels[i], float(scores[i])) for i in top if scores[i] >= min_score]
+
+
+class EmbeddingService:
+    """
+    Embeddings for semantic job-role search and resume-to-JD matching.
+    Role vectors live in a VectorIndex; ad-hoc texts are cached in a small LRU.
+    """
+
+    def __init__(self, text_cache_size: int = 256):
+        if settings.EMBEDDING_PROVIDER.lower() == "stub":
+            self.embedder = HashingEmbedder()
+        else:
+            self.embedder = OllamaEmbedder(settings.EMBEDDING_MODEL)
+        self._roles: Optional[VectorIndex] = None
+        self._text_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._text_cache_size = text_cache_size
+        # Created on first use, inside the running loop (this service is built at import)
+        self._sync_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def roles(self) -> VectorIndex:
+        if self._roles is None:
+            self._roles = VectorIndex(settings.EMBEDDING_INDEX_DIR, "job_roles", self.embedder.name)
+        return self._roles
+
+    async def embed_text(self, text: str) -> np.ndarray:
+        key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        cached = self._text_cache.get(key)
+        if cached is not None:
+            self._text_cache.move_to_end(key)
+            return cached
+        vector = (await self.embedder.embed([text]))[0]
+        self._text_cache[key] = vector
+        if len(self._text_cache) > self._text_cache_size:
+            self._text_cache.popitem(last=False)
+        return vector
+
+    async def sync_job_roles(self, db: AsyncSession, batch_size: int = 64) -> int:
+        """Embed job roles that are not in the index yet. Returns the number added."""
+        if self._sync_lock is None:
+            self._sync_lock = asyncio.Lock()
+        async with self._sync_lock:
+            result = await db.execute(select(JobRole.id, JobRole.name).order_by(JobRole.id))
+            rows = result.all()
+            index = self.roles
+            index.refresh()
+            missing = set(index.missing([r.id for r in rows]))
+            pending = [r for r in rows if r.id in missing]
+            for start in range(0, len(pending), batch_size):
+                batch = pending[start:start + batch_size]
+                vectors = await self.embedder.embed([r.name for r in batch])
+                await index.add([r.id for r in batch], [r.name for r in batch], vectors)
+            if pending:
+                logger.info("Embedded %d new job roles (%d total)", len(pending), len(index))
+            return len(pending)
+
+    async def search_roles(self, query: str, k: int = 10,
+                           min_score: Optional[float] = None) -> List[Tuple[int, str, float]]:
+        index = self.roles
+        index.refresh()
+        if not len(index):
+            return []
+        vector = await self.embed_text(query)
+        threshold = settings.SEMANTIC_MIN_SCORE if min_score is None else min_score
+        return index.search(vector, k, threshold)
+
+    async def similarity(self, text_a: str, text_b: str) -> float:
+        a = await self.embed_text(text_a)
+        b = await self.embed_text(text_b)
+        return float(np.dot(a, b))
+
+
+embedding_service = EmbeddingService()
@@ -0,0 +1,183 @@
+import asyncio
+import hashlib
+import logging
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Optional
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+from sqlalchemy import delete, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from starlette.responses import Response
+
+from app.core.config import settings
+from app.core.db import SessionLocal
+from app.core.metrics import IDEMPOTENT_REQUESTS
+from app.core.serialization import ORJSONResponse, json_dumps
+from app.models.models import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL = 0.1  # seconds, doubled up to MAX_POLL_INTERVAL while waiting on a duplicate
+MAX_POLL_INTERVAL = 1.0
+
+
+def request_fingerprint(endpoint: str, payload: Any) -> str:
+    return hashlib.sha256(f"{endpoint}\n{json_dumps(payload)}".encode("utf-8")).hexdigest()
+
+
+class IdempotentRequest:
+    """
+    Outcome of presenting an Idempotency-Key: either a stored response to replay,
+    or a claimed key the handler completes once it has created its resource.
+    """
+
+    def __init__(self, record_id: Optional[int] = None, token: Optional[str] = None,
+                 replay: Optional[Response] = None):
+        self.record_id = record_id
+        self.token = token
+        self.replay = replay
+
+    async def complete(self, db: AsyncSession, status_code: int, body: BaseModel) -> None:
+        """Store the response in the caller's transaction, so it commits atomically with the resource."""
+        if self.record_id is None:
+            return
+        await db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.id == self.record_id, IdempotencyKey.claim_token == self.token)
+            .values(status="completed", response_code=status_code, response_body=body.model_dump(mode="json")))
+
+
+def _lease_expiry() -> datetime:
+    return datetime.now(timezone.utc) + timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS)
+
+
+@asynccontextmanager
+async def idempotent(endpoint: str, user_id: int, key: Optional[str],
+                     fingerprint: str) -> AsyncIterator[IdempotentRequest]:
+    """
+    Guard a non-idempotent POST. Without a key this is a no-op.
+    A retry of a completed request gets the original response, and a retry that
+    arrives while the first attempt is running waits for it. If the handler fails
+    before completing, the key is released so the client can try again. The claim is
+    a lease renewed while the handler runs; if its worker dies, a retry takes it over
+    once the lease lapses.
+    """
+    if key is None:
+        yield IdempotentRequest()
+        return
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+
+    request = await _claim_or_wait(endpoint, user_id, key, fingerprint)
+    renewal = None
+    if request.record_id is not None:
+        renewal = asyncio.ensure_future(_renew(request.record_id, request.token))
+    try:
+        yield request
+    finally:
+        if renewal is not None:
+            renewal.cancel()
+            # No-op once completed; otherwise free the key for a retry
+            await asyncio.shield(_release(request.record_id, request.token))
+
+
+async def _claim_or_wait(endpoint: str, user_id: int, key: str, fingerprint: str) -> IdempotentRequest:
+    loop = asyncio.get_event_loop()
+    deadline = loop.time() + settings.IDEMPOTENCY_WAIT_SECONDS
+    interval = POLL_INTERVAL
+    while True:
+        async with SessionLocal() as db:
+            now = datetime.now(timezone.utc)
+            await db.execute(delete(IdempotencyKey).where(
+                IdempotencyKey.user_id == user_id, IdempotencyKey.key == key, IdempotencyKey.expires_at <= now))
+            result = await db.execute(select(IdempotencyKey).where(
+                IdempotencyKey.user_id == user_id, IdempotencyKey.key == key))
+            record = result.scalars().first()
+
+            token = uuid.uuid4().hex
+            if record is None:
+                record = IdempotencyKey(
+                    user_id=user_id, key=key, fingerprint=fingerprint, status="in_progress",
+                    claim_token=token, lease_expires_at=_lease_expiry(),
+                    expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS))
+                db.add(record)
+                try:
+                    await db.flush()
+                    record_id = record.id
+                    await db.commit()
+                except IntegrityError:
+                    # A concurrent duplicate claimed it first; wait on that one instead
+                    await db.rollback()
+                    continue
+                IDEMPOTENT_REQUESTS.labels(endpoint, "claimed").inc()
+                return IdempotentRequest(record_id=record_id, token=token)
+
+            if record.fingerprint != fingerprint:
+                IDEMPOTENT_REQUESTS.labels(endpoint, "mismatch").inc()
+                raise HTTPException(
+                    status_code=422, detail="Idempotency-Key was already used with a different request")
+            if record.status == "completed":
+                IDEMPOTENT_REQUESTS.labels(endpoint, "replayed").inc()
+                return IdempotentRequest(replay=ORJSONResponse(
+                    record.response_body, status_code=record.response_code,
+                    headers={"Idempotent-Replayed": "true"}))
+
+            # In progress: take it over if its holder stopped renewing the lease
+            record_id = record.id
+            result = await db.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.id == record_id, IdempotencyKey.status == "in_progress",
+                       or_(IdempotencyKey.lease_expires_at.is_(None), IdempotencyKey.lease_expires_at <= now))
+                .values(claim_token=token, lease_expires_at=_lease_expiry())
+                .execution_options(synchronize_session=False))
+            await db.commit()
+            if result.rowcount:
+                logger.warning("Taking over abandoned Idempotency-Key claim %s", record_id)
+                IDEMPOTENT_REQUESTS.labels(endpoint, "reclaimed").inc()
+                return IdempotentRequest(record_id=record_id, token=token)
+
+        if loop.time() >= deadline:
+            IDEMPOTENT_REQUESTS.labels(endpoint, "in_progress").inc()
+            raise HTTPException(
+                status_code=409, detail="A request with this Idempotency-Key is still being processed",
+                headers={"Retry-After": "1"})
+        await asyncio.sleep(interval)
+        interval = min(interval * 2, MAX_POLL_INTERVAL)
+
+
+async def _renew(record_id: int, token: str) -> None:
+    while True:
+        await asyncio.sleep(settings.IDEMPOTENCY_LEASE_SECONDS / 3)
+        try:
+            async with SessionLocal() as db:
+                await db.execute(
+                    update(IdempotencyKey)
+                    .where(IdempotencyKey.id == record_id, IdempotencyKey.claim_token == token,
+                           IdempotencyKey.status == "in_progress")
+                    .values(lease_expires_at=_lease_expiry()))
+                await db.commit()
+        except Exception:
+            logger.exception("Failed to renew Idempotency-Key claim %s", record_id)
+
+
+async def _release(record_id: int, token: str) -> None:
+    async with SessionLocal() as db:
+        # Only our own claim: after a takeover the key belongs to the retry
+        await db.execute(delete(IdempotencyKey).where(
+            IdempotencyKey.id == record_id, IdempotencyKey.claim_token == token,
+            IdempotencyKey.status == "in_progress"))
+        await db.commit()
+
+
+async def purge_expired() -> int:
+    async with SessionLocal() as db:
+        result = await db.execute(
+            delete(IdempotencyKey).where(IdempotencyKey.expires_at <= datetime.now(timezone.utc)))
+        await db.commit()
+        return result.rowcount
@@ -0,0 +1,34 @@
+import asyncio
+import logging
+from typing import Awaitable, Set
+
+logger = logging.getLogger(__name__)
+
+# Background jobs the lifespan shutdown waits for. The server drains (and, past its
+# graceful timeout, cancels) request tasks itself but does not wait for them to unwind.
+_tasks: Set[asyncio.Task] = set()
+
+
+def track(task: asyncio.Task) -> None:
+    """Have drain() wait for a job already running on task (e.g. a BackgroundTask)."""
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+def spawn(coro: Awaitable) -> asyncio.Task:
+    """Run a job outside any request (e.g. one requeued at startup)."""
+    task = asyncio.ensure_future(coro)
+    track(task)
+    return task
+
+
+async def drain(timeout: float) -> None:
+    """Give spawned jobs up to timeout seconds to finish, then cancel the rest."""
+    if not _tasks:
+        return
+    _, pending = await asyncio.wait(set(_tasks), timeout=timeout)
+    if pending:
+        logger.warning("Cancelling %d background job(s) still running at shutdown", len(pending))
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
@@ -1,18 +1,25 @@
 from pypdf import PdfReader
 import docx
+import time
 import asyncio
+import logging
 from functools import partial
+from app.core.metrics import EXTRACTION_DURATION, EXTRACTION_PAGES
+from app.core.profiling import span
+
+logger = logging.getLogger(__name__)
 
 
 def _extract_pdf_sync(file_path: str) -> str:
     try:
         reader = PdfReader(file_path)
+        EXTRACTION_PAGES.labels("pdf").observe(len(reader.pages))
         text = ""
         for page in reader.pages:
             text += page.extract_text()
         return text
     except Exception as e:
-        print(f"Error extracting PDF: {e}")
+        logger.error("Error extracting PDF: %s", e)
         return ""
 
 
@@ -21,14 +28,21 @@ def _extract_docx_sync(file_path: str) -> str:
         doc = docx.Document(file_path)
         return "\n".join([para.text for para in doc.paragraphs])
     except Exception as e:
-        print(f"Error extracting DOCX: {e}")
+        logger.error("Error extracting DOCX: %s", e)
         return ""
 
 
 async def extract_text(file_path: str, content_type: str) -> str:
     loop = asyncio.get_event_loop()
     if "pdf" in content_type:
-        return await loop.run_in_executor(None, partial(_extract_pdf_sync, file_path))
+        kind, extractor = "pdf", _extract_pdf_sync
     elif "word" in content_type or "docx" in content_type:
-        return await loop.run_in_executor(None, partial(_extract_docx_sync, file_path))
-    return ""
+        kind, extractor = "docx", _extract_docx_sync
+    else:
+        return ""
+    start = time.perf_counter()
+    try:
+        with span("executor", f"extract_text:{kind}"):
+            return await loop.run_in_executor(None, partial(extractor, file_path))
+    finally:
+        EXTRACTION_DURATION.labels(kind).observe(time.perf_counter() - start)
@@ -0,0 +1,310 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from fpdf import FPDF
+from fpdf.enums import XPos, YPos
+
+from app.core.config import settings
+from app.core.profiling import span
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the layout code below changes so stale cached PDFs are not served.
+RENDERER_VERSION = "1"
+
+# Per-template layout knobs. Keys mirror the ids in app.api.resume.TEMPLATES.
+TEMPLATE_STYLES: Dict[str, Dict[str, Any]] = {
+    "minimal-pro": {
+        "font": "Helvetica", "accent": (40, 40, 40), "upper_headings": True,
+        "order": ["summary", "work_experience", "skills", "projects", "education"],
+    },
+    "modern-ats": {
+        "font": "Helvetica", "accent": (30, 64, 175), "upper_headings": True,
+        "order": ["summary", "skills", "work_experience", "projects", "education"],
+    },
+    "fresher-grad": {
+        "font": "Helvetica", "accent": (4, 120, 87), "upper_headings": False,
+        "order": ["summary", "education", "projects", "skills", "work_experience"],
+    },
+    "leadership": {
+        "font": "Times", "accent": (17, 24, 39), "upper_headings": True,
+        "order": ["summary", "work_experience", "skills", "education", "projects"],
+    },
+    "academic": {
+        "font": "Times", "accent": (88, 28, 135), "upper_headings": False,
+        "order": ["summary", "education", "projects", "work_experience", "skills"],
+    },
+}
+DEFAULT_TEMPLATE = "modern-ats"
+
+SECTION_TITLES = {
+    "summary": "Professional Summary",
+    "skills": "Skills",
+    "work_experience": "Experience",
+    "education": "Education",
+    "projects": "Projects",
+}
+
+# Core PDF fonts only cover latin-1, so map the usual LLM typography first.
+_CHAR_MAP = str.maketrans({
+    "‘": "'", "’": "'", "“": '"', "”": '"',
+    "–": "-", "—": "-", "•": "-", "…": "...", " ": " ",
+})
+
+
+def _text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, dict):
+        return ", ".join(_text(v) for v in value.values() if v)
+    if isinstance(value, list):
+        return ", ".join(_text(v) for v in value if v)
+    return str(value).translate(_CHAR_MAP).encode("latin-1", "replace").decode("latin-1")
+
+
+def _bullets(item: Dict[str, Any]) -> List[str]:
+    points = item.get("points") or item.get("highlights") or []
+    if isinstance(points, str):
+        points = [points]
+    bullets = [_text(p) for p in points if p]
+    description = item.get("description")
+    if description and not bullets:
+        bullets = [_text(description)]
+    return bullets
+
+
+def _render_to_file(content: Dict[str, Any], template_id: str, out_path: str) -> int:
+    """
+    Lay out a generated resume as PDF and write it to out_path.
+    Runs inside the render process pool, so it must stay a picklable top-level function.
+    """
+    style = TEMPLATE_STYLES.get(template_id, TEMPLATE_STYLES[DEFAULT_TEMPLATE])
+    font = style["font"]
+    accent = style["accent"]
+
+    pdf = FPDF(format="A4")
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.set_margins(18, 15, 18)
+    pdf.add_page()
+
+    def line(text: str, size: float = 10, bold: bool = False, height: float = 5, align: str = "L"):
+        pdf.set_font(font, "B" if bold else "", size)
+        pdf.multi_cell(0, height, text, align=align,
+                       new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    def heading(title: str):
+        pdf.ln(3)
+        pdf.set_text_color(*accent)
+        line(title.upper() if style["upper_headings"] else title, size=12, bold=True, height=6)
+        pdf.set_draw_color(*accent)
+        pdf.line(pdf.l_margin, pdf.get_y(), pdf.w - pdf.r_margin, pdf.get_y())
+        pdf.set_text_color(0, 0, 0)
+        pdf.ln(1.5)
+
+    # Header
+    line(_text(content.get("full_name")) or "Resume", size=20, bold=True, height=9)
+    contact = content.get("contact_info") or {
+        k: content.get(k) for k in ("email", "phone") if content.get(k)}
+    if contact:
+        line(" | ".join(_text(v) for v in contact.values() if v) if isinstance(contact, dict)
+             else _text(contact), size=9)
+
+    for section in style["order"]:
+        value = content.get(section)
+        if not value:
+            continue
+        heading(SECTION_TITLES[section])
+        if isinstance(value, str):
+            line(_text(value))
+        elif section == "skills":
+            if isinstance(value, dict):
+                for group, skills in value.items():
+                    line(f"{_text(group)}: {_text(skills)}")
+            else:
+                line(_text(value))
+        else:
+            for item in value if isinstance(value, list) else [value]:
+                if not isinstance(item, dict):
+                    line(f"- {_text(item)}")
+                    continue
+                title = item.get("role") or item.get("degree") or item.get("name") or item.get("title")
+                org = item.get("company") or item.get("institution")
+                when = item.get("duration") or item.get("year") or item.get("dates")
+                line(" - ".join(_text(p) for p in (title, org) if p), bold=True)
+                if when:
+                    line(_text(when), size=9)
+                for bullet in _bullets(item):
+                    line(f"- {bullet}")
+                pdf.ln(1.5)
+
+    pdf.output(out_path)
+    return os.path.getsize(out_path)
+
+
+def _discard(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def render_key(content: Dict[str, Any], template_id: str) -> str:
+    """Cache key: content hash + template + renderer version."""
+    payload = json.dumps(content, sort_keys=True, separators=(",", ":"), default=str)
+    digest = hashlib.sha256()
+    digest.update(payload.encode("utf-8"))
+    digest.update(f"|{template_id}|{RENDERER_VERSION}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """
+    On-disk PDF cache with LRU eviction bounded by total bytes.
+    Recency is tracked in memory and seeded from file mtimes on startup.
+    Every method touches the filesystem, so callers on the event loop run them in the
+    executor; the lock keeps the index consistent across those threads.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._total = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".pdf"):
+                continue
+            stat = os.stat(os.path.join(self.directory, name))
+            entries.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total += size
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pdf")
+
+    def tmp_path(self) -> str:
+        return os.path.join(self.directory, f".{uuid.uuid4().hex}.tmp")
+
+    def get(self, key: str) -> Optional[str]:
+        path = self.path_for(key)
+        with self._lock:
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                if key in self._index:
+                    self._total -= self._index.pop(key)
+                return None
+            if key not in self._index:
+                # Written by a sibling process sharing the directory
+                self._index[key] = size
+                self._total += size
+            self._index.move_to_end(key)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def commit(self, key: str, tmp_path: str, size: int) -> str:
+        path = self.path_for(key)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._total -= self._index.pop(key, 0)
+            self._index[key] = size
+            self._total += size
+            self._evict()
+        return path
+
+    def _evict(self):
+        while self._total > self.max_bytes and len(self._index) > 1:
+            key, size = self._index.popitem(last=False)
+            self._total -= size
+            _discard(self.path_for(key))
+
+
+class PDFRenderer:
+    """
+    Renders generated resumes to PDF in a process pool and fronts them with RenderCache.
+    Concurrent requests for the same key share a single render.
+    """
+
+    def __init__(self):
+        self._cache: Optional[RenderCache] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def prepare(self) -> RenderCache:
+        """Scan the cache directory (called at startup; listing it blocks)."""
+        if self._cache is None:
+            loop = asyncio.get_event_loop()
+            cache = await loop.run_in_executor(
+                None, RenderCache, settings.PDF_CACHE_DIR, settings.PDF_CACHE_MAX_BYTES)
+            # A concurrent prepare() may have finished first
+            if self._cache is None:
+                self._cache = cache
+        return self._cache
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=settings.PDF_RENDER_WORKERS)
+        return self._executor
+
+    async def render(self, content: Dict[str, Any], template_id: str, key: Optional[str] = None) -> str:
+        """Return the path of the cached PDF, rendering it first on a miss."""
+        key = key or render_key(content, template_id)
+        cache = await self.prepare()
+        loop = asyncio.get_running_loop()
+        pending = self._inflight.get(key)
+        if pending is None:
+            path = await loop.run_in_executor(None, cache.get, key)
+            if path:
+                return path
+            # A render may have started while the lookup was off the loop
+            pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = loop.create_future()
+        self._inflight[key] = future
+        tmp_path = cache.tmp_path()
+        try:
+            with span("executor", "render_pdf"):
+                size = await loop.run_in_executor(
+                    self._get_executor(), _render_to_file, content, template_id, tmp_path)
+            path = await loop.run_in_executor(None, cache.commit, key, tmp_path, size)
+            future.set_result(path)
+            return path
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            logger.exception("PDF render failed for key %s", key)
+            future.set_exception(e)
+            # Mark retrieved so a failure nobody else awaited is not logged twice
+            future.exception()
+            await loop.run_in_executor(None, _discard, tmp_path)
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+pdf_renderer = PDFRenderer()
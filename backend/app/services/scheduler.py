@@ -0,0 +1,216 @@
+import asyncio
+import itertools
+import logging
+import math
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import LLM_QUEUE_DEPTH, LLM_QUEUE_WAIT, LLM_SHED
+from app.core.profiling import span
+from app.core.state import state
+
+logger = logging.getLogger(__name__)
+
+# Priority classes; lower runs first
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+ANONYMOUS = "anonymous"
+# Completion length assumed when charging a call against the token quota up front
+COMPLETION_TOKEN_ESTIMATE = 500
+QUOTA_WINDOW = 60  # seconds
+
+# Who the current LLM call is for, and at which priority. Set per request by
+# deps.get_current_user (per user) or deps.get_client_caller (per client address);
+# background jobs set it themselves. Calls made outside all of those share ANONYMOUS.
+_caller: ContextVar[Tuple[str, int]] = ContextVar("llm_caller", default=(ANONYMOUS, INTERACTIVE))
+
+
+def set_caller(caller: str, priority: int = INTERACTIVE) -> None:
+    _caller.set((caller, priority))
+
+
+def estimate_tokens(prompt: str) -> int:
+    return len(prompt) // 4 + COMPLETION_TOKEN_ESTIMATE
+
+
+class SchedulerRejected(Exception):
+    """An LLM call refused by admission control; surfaced as 429/503 with Retry-After."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: float):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class _Waiter:
+    __slots__ = ("caller", "priority", "start", "finish", "seq", "future")
+
+    def __init__(self, caller: str, priority: int, start: float, finish: float, seq: int):
+        self.caller = caller
+        self.priority = priority
+        self.start = start
+        self.finish = finish
+        self.seq = seq
+        self.future: asyncio.Future = asyncio.get_event_loop().create_future()
+
+
+class Ticket:
+    """A granted slot. settle() corrects the quota charge once real token counts are known."""
+
+    def __init__(self, caller: str, charged: int):
+        self.caller = caller
+        self.charged = charged
+
+    async def settle(self, tokens: Optional[int]) -> None:
+        if tokens and self.charged and tokens != self.charged:
+            await state.incr(_quota_key(self.caller), tokens - self.charged, ttl=2 * QUOTA_WINDOW)
+            self.charged = tokens
+
+
+def _quota_key(caller: str) -> str:
+    return f"llm_tokens:{caller}:{int(time.time() // QUOTA_WINDOW)}"
+
+
+class FairScheduler:
+    """
+    Admission control in front of the LLM provider.
+    Calls are ordered by priority class, then by weighted fair queuing between callers:
+    each call gets a virtual finish tag advanced by its token cost, so a caller with many
+    queued calls is interleaved with everyone else instead of running ahead of them.
+    Per-caller concurrency and a per-minute token quota cap any one user.
+    Interactive calls that would queue past their budget are shed.
+    """
+
+    def __init__(self, slots: int, caller_concurrency: int, tokens_per_minute: int,
+                 queue_budgets: Dict[int, Optional[float]]):
+        self.slots = slots
+        self.caller_concurrency = caller_concurrency
+        self.tokens_per_minute = tokens_per_minute
+        self.queue_budgets = queue_budgets
+        self.active = 0
+        self.active_by_caller: Dict[str, int] = defaultdict(int)
+        self._queue: List[_Waiter] = []
+        self._finish_tags: Dict[str, float] = {}
+        self._vtime = 0.0
+        self._seq = itertools.count()
+        # Moving average of seconds a call holds its slot, for projecting queue waits
+        self._service_time = 2.0
+
+    @asynccontextmanager
+    async def slot(self, cost: int, weight: float = 1.0) -> AsyncIterator[Ticket]:
+        caller, priority = _caller.get()
+        priority_name = PRIORITY_NAMES[priority]
+        charged = await self._charge_quota(caller, priority, cost)
+
+        start_tag = max(self._vtime, self._finish_tags.get(caller, 0.0))
+        waiter = _Waiter(caller, priority, start_tag, start_tag + cost / weight, next(self._seq))
+        self._finish_tags[caller] = waiter.finish
+        self._queue.append(waiter)
+        self._dispatch()
+
+        queued_at = time.perf_counter()
+        if not waiter.future.done():
+            with span("llm_queue", priority_name):
+                await self._wait(waiter, priority_name, charged)
+        LLM_QUEUE_WAIT.labels(priority_name).observe(time.perf_counter() - queued_at)
+
+        started = time.perf_counter()
+        try:
+            yield Ticket(caller, charged)
+        finally:
+            self._service_time = 0.8 * self._service_time + 0.2 * (time.perf_counter() - started)
+            self._release(caller)
+
+    async def _wait(self, waiter: _Waiter, priority_name: str, charged: int) -> None:
+        budget = self.queue_budgets.get(waiter.priority)
+        if budget is not None:
+            # Shed immediately when the backlog ahead already exceeds the budget
+            ahead = sum(1 for w in self._queue if w.priority <= waiter.priority and w is not waiter)
+            projected = (ahead + 1) * self._service_time / self.slots
+            if projected > budget:
+                self._abandon(waiter)
+                await self._refund(waiter.caller, charged)
+                LLM_SHED.labels(priority_name, "overload").inc()
+                raise SchedulerRejected(503, "AI service is busy, please retry shortly", projected)
+
+        LLM_QUEUE_DEPTH.labels(priority_name).inc()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=budget)
+        except BaseException as e:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted just as we gave up; hand the slot on
+                self._release(waiter.caller)
+            else:
+                self._abandon(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                await self._refund(waiter.caller, charged)
+                LLM_SHED.labels(priority_name, "queue_timeout").inc()
+                raise SchedulerRejected(503, "AI service is busy, please retry shortly", self._service_time)
+            raise
+        finally:
+            LLM_QUEUE_DEPTH.labels(priority_name).dec()
+
+    def _dispatch(self) -> None:
+        while self.active < self.slots:
+            runnable = [w for w in self._queue
+                        if self.active_by_caller[w.caller] < self.caller_concurrency]
+            if not runnable:
+                return
+            waiter = min(runnable, key=lambda w: (w.priority, w.finish, w.seq))
+            self._queue.remove(waiter)
+            self._vtime = max(self._vtime, waiter.start)
+            self.active += 1
+            self.active_by_caller[waiter.caller] += 1
+            waiter.future.set_result(None)
+        if len(self._finish_tags) > 1000:
+            # Callers whose tags fell behind virtual time no longer affect ordering
+            self._finish_tags = {c: f for c, f in self._finish_tags.items() if f > self._vtime}
+
+    def _release(self, caller: str) -> None:
+        self.active -= 1
+        self.active_by_caller[caller] -= 1
+        if not self.active_by_caller[caller]:
+            del self.active_by_caller[caller]
+        self._dispatch()
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        if waiter in self._queue:
+            self._queue.remove(waiter)
+        waiter.future.cancel()
+
+    async def _charge_quota(self, caller: str, priority: int, cost: int) -> int:
+        """Charge cost against the caller's per-minute token quota; returns the amount charged."""
+        if not self.tokens_per_minute or caller == ANONYMOUS:
+            return 0
+        while True:
+            used = await state.incr(_quota_key(caller), cost, ttl=2 * QUOTA_WINDOW)
+            # A single call larger than the whole quota is still allowed into an empty window
+            if used <= self.tokens_per_minute or used == cost:
+                return cost
+            await self._refund(caller, cost)
+            retry_after = QUOTA_WINDOW - time.time() % QUOTA_WINDOW
+            if priority != INTERACTIVE:
+                # Background work is throttled into the next window rather than failed
+                await asyncio.sleep(retry_after)
+                continue
+            LLM_SHED.labels(PRIORITY_NAMES[priority], "quota").inc()
+            raise SchedulerRejected(429, "AI usage limit reached, please retry shortly", retry_after)
+
+    async def _refund(self, caller: str, charged: int) -> None:
+        if charged:
+            await state.incr(_quota_key(caller), -charged, ttl=2 * QUOTA_WINDOW)
+
+
+scheduler = FairScheduler(
+    slots=settings.LLM_MAX_CONCURRENCY,
+    caller_concurrency=settings.LLM_USER_CONCURRENCY,
+    tokens_per_minute=settings.LLM_USER_TOKENS_PER_MINUTE,
+    queue_budgets={INTERACTIVE: settings.LLM_INTERACTIVE_QUEUE_BUDGET, BACKGROUND: None},
+)
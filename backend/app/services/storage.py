@@ -0,0 +1,314 @@
+import asyncio
+import hashlib
+import logging
+import os
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+import aiofiles
+from fastapi import UploadFile
+from fastapi.responses import FileResponse, RedirectResponse
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from starlette.responses import Response
+
+from app.core.config import settings
+from app.core.profiling import span
+from app.models.models import Blob
+
+logger = logging.getLogger(__name__)
+
+
+class IngestedBlob:
+    """A spooled upload: content hash, size and a local copy valid inside ingest()."""
+
+    def __init__(self, sha256: str, size: int, local_path: str):
+        self.sha256 = sha256
+        self.size = size
+        self.local_path = local_path
+
+
+def _write_chunk(f, hasher, chunk: bytes) -> None:
+    hasher.update(chunk)
+    f.write(chunk)
+
+
+def _finish_file(f, fsync: bool) -> None:
+    f.flush()
+    if fsync:
+        os.fsync(f.fileno())
+    f.close()
+
+
+class BlobStore(ABC):
+    """
+    Content-addressed storage for uploaded originals.
+    Blobs are keyed by sha256 and laid out as ab/cd/<sha256>; identical uploads share one blob.
+    """
+
+    def __init__(self, spool_dir: str, buffer_size: int, fsync: bool):
+        self.spool_dir = spool_dir
+        self.buffer_size = buffer_size
+        self.fsync = fsync
+        os.makedirs(spool_dir, exist_ok=True)
+
+    @staticmethod
+    def key_for(sha256: str) -> str:
+        return f"{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+    async def _spool(self, read: Callable[[int], Awaitable[bytes]]) -> IngestedBlob:
+        loop = asyncio.get_event_loop()
+        path = os.path.join(self.spool_dir, f".{uuid.uuid4().hex}.part")
+        hasher = hashlib.sha256()
+        size = 0
+        f = await loop.run_in_executor(None, lambda: open(path, "wb", buffering=self.buffer_size))
+        try:
+            try:
+                while chunk := await read(self.buffer_size):
+                    size += len(chunk)
+                    # Hash and write off the event loop in one hop
+                    await loop.run_in_executor(None, _write_chunk, f, hasher, chunk)
+            finally:
+                await loop.run_in_executor(None, _finish_file, f, self.fsync)
+        except BaseException:
+            # A failed or cancelled read leaves a partial spool file nobody will clean up
+            await asyncio.shield(self._remove(path))
+            raise
+        return IngestedBlob(hasher.hexdigest(), size, path)
+
+    @asynccontextmanager
+    async def ingest(self, upload: UploadFile) -> AsyncIterator[IngestedBlob]:
+        """Stream an upload to a local spool file, hashing as it goes."""
+        with span("executor", "blob_spool"):
+            blob = await self._spool(upload.read)
+        try:
+            yield blob
+        finally:
+            await self._remove(blob.local_path)
+
+    @asynccontextmanager
+    async def ingest_path(self, path: str) -> AsyncIterator[IngestedBlob]:
+        async with aiofiles.open(path, "rb") as f:
+            blob = await self._spool(f.read)
+        try:
+            yield blob
+        finally:
+            await self._remove(blob.local_path)
+
+    @staticmethod
+    def _discard(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    async def _remove(self, path: str) -> None:
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self._discard, path)
+
+    async def prepare(self) -> None:
+        """Create whatever the backend needs before the first upload (called at startup)."""
+
+    @abstractmethod
+    async def persist(self, blob: IngestedBlob) -> None:
+        """Make the spooled content durable under its content key (no-op if already stored)."""
+
+    @abstractmethod
+    async def delete(self, sha256: str) -> None:
+        """Remove the stored content (no-op if already gone)."""
+
+    @abstractmethod
+    async def download_response(self, sha256: str, filename: str, content_type: str,
+                                headers: Optional[dict] = None) -> Response:
+        """Response that serves the stored content as an attachment."""
+
+
+class LocalBlobStore(BlobStore):
+    def __init__(self, root: str, buffer_size: int, fsync: bool):
+        self.root = root
+        super().__init__(os.path.join(root, "tmp"), buffer_size, fsync)
+
+    def path_for(self, sha256: str) -> str:
+        return os.path.join(self.root, self.key_for(sha256))
+
+    def _persist_sync(self, blob: IngestedBlob) -> None:
+        final = self.path_for(blob.sha256)
+        if os.path.exists(final):
+            return
+        os.makedirs(os.path.dirname(final), exist_ok=True)
+        # Hard link keeps the spool file owned by ingest(); rename would race its cleanup
+        try:
+            os.link(blob.local_path, final)
+        except FileExistsError:
+            return
+        if self.fsync:
+            fd = os.open(os.path.dirname(final), os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    async def persist(self, blob: IngestedBlob) -> None:
+        loop = asyncio.get_event_loop()
+        with span("executor", "blob_persist"):
+            await loop.run_in_executor(None, self._persist_sync, blob)
+
+    async def delete(self, sha256: str) -> None:
+        await self._remove(self.path_for(sha256))
+
+    async def download_response(self, sha256: str, filename: str, content_type: str,
+                                headers: Optional[dict] = None) -> Response:
+        # FileResponse streams from disk (and uses pathsend where the server supports it)
+        return FileResponse(self.path_for(sha256), media_type=content_type,
+                            filename=filename, headers=headers)
+
+
+class S3BlobStore(BlobStore):
+    """
+    S3-compatible backend. Point S3_ENDPOINT_URL at MinIO (docker-compose profile "s3")
+    to run against a local stand-in. S3_BUCKET is created at startup if it doesn't exist.
+    """
+
+    def __init__(self, spool_dir: str, buffer_size: int, fsync: bool):
+        import boto3
+
+        super().__init__(spool_dir, buffer_size, fsync)
+        self.bucket = settings.S3_BUCKET
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=settings.S3_ENDPOINT_URL or None,
+            region_name=settings.S3_REGION,
+            aws_access_key_id=settings.S3_ACCESS_KEY_ID or None,
+            aws_secret_access_key=settings.S3_SECRET_ACCESS_KEY or None,
+        )
+
+    def _ensure_bucket(self) -> None:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_bucket(Bucket=self.bucket)
+            return
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") not in ("404", "NoSuchBucket", "NotFound"):
+                raise
+        params = {"Bucket": self.bucket}
+        if settings.S3_REGION != "us-east-1":
+            params["CreateBucketConfiguration"] = {"LocationConstraint": settings.S3_REGION}
+        try:
+            self.client.create_bucket(**params)
+            logger.info("Created S3 bucket %s", self.bucket)
+        except ClientError as e:
+            # Another worker starting at the same time created it first
+            if e.response.get("Error", {}).get("Code") not in ("BucketAlreadyOwnedByYou", "BucketAlreadyExists"):
+                raise
+
+    async def prepare(self) -> None:
+        loop = asyncio.get_event_loop()
+        try:
+            await loop.run_in_executor(None, self._ensure_bucket)
+        except Exception:
+            # Uploads will fail until the bucket exists, but downloads and the rest of the API work
+            logger.exception("Could not check or create S3 bucket %s", self.bucket)
+
+    def _persist_sync(self, blob: IngestedBlob) -> None:
+        from botocore.exceptions import ClientError
+
+        key = self.key_for(blob.sha256)
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") not in ("404", "NoSuchKey", "NotFound"):
+                raise
+        # upload_file switches to multipart for large files
+        self.client.upload_file(blob.local_path, self.bucket, key)
+
+    async def persist(self, blob: IngestedBlob) -> None:
+        loop = asyncio.get_event_loop()
+        with span("executor", "blob_persist"):
+            await loop.run_in_executor(None, self._persist_sync, blob)
+
+    async def delete(self, sha256: str) -> None:
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(
+            None, lambda: self.client.delete_object(Bucket=self.bucket, Key=self.key_for(sha256)))
+
+    async def download_response(self, sha256: str, filename: str, content_type: str,
+                                headers: Optional[dict] = None) -> Response:
+        loop = asyncio.get_event_loop()
+        url = await loop.run_in_executor(None, lambda: self.client.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": self.key_for(sha256),
+                "ResponseContentType": content_type,
+                "ResponseContentDisposition": f'attachment; filename="{filename}"',
+            },
+            ExpiresIn=300,
+        ))
+        return RedirectResponse(url, status_code=307, headers=headers)
+
+
+def _create_store() -> BlobStore:
+    backend = settings.STORAGE_BACKEND.lower()
+    if backend == "s3":
+        return S3BlobStore(os.path.join(settings.BLOB_DIR, "tmp"),
+                           settings.BLOB_WRITE_BUFFER, settings.BLOB_FSYNC)
+    return LocalBlobStore(settings.BLOB_DIR, settings.BLOB_WRITE_BUFFER, settings.BLOB_FSYNC)
+
+
+blob_store = _create_store()
+
+
+async def acquire_blob(db: AsyncSession, blob: IngestedBlob, content_type: str) -> None:
+    """
+    Take a reference on the content's Blob row, then persist the content if it is missing.
+    The refcount UPDATE (or INSERT) holds the row lock until the caller commits, so it is
+    serialized with collect_blob(): either the collection finishes first and the content is
+    persisted again here, or the collection sees this reference and keeps the content.
+    Content is durable before the caller commits.
+    """
+    result = await db.execute(
+        update(Blob).where(Blob.sha256 == blob.sha256).values(refcount=Blob.refcount + 1))
+    if not result.rowcount:
+        try:
+            async with db.begin_nested():
+                db.add(Blob(sha256=blob.sha256, size=blob.size,
+                            content_type=content_type, refcount=1))
+        except IntegrityError:
+            # A concurrent upload of the same content inserted it first
+            await db.execute(
+                update(Blob).where(Blob.sha256 == blob.sha256).values(refcount=Blob.refcount + 1))
+    await blob_store.persist(blob)
+
+
+async def release_blob(db: AsyncSession, sha256: str) -> bool:
+    """
+    Drop a reference. Returns True when it was the last one; the caller should then
+    call collect_blob() after committing. The row itself is left for collect_blob().
+    """
+    await db.execute(
+        update(Blob).where(Blob.sha256 == sha256).values(refcount=Blob.refcount - 1))
+    result = await db.execute(select(Blob.refcount).where(Blob.sha256 == sha256))
+    refcount = result.scalar()
+    return refcount is not None and refcount <= 0
+
+
+async def collect_blob(db: AsyncSession, sha256: str) -> bool:
+    """
+    Delete an unreferenced blob's row and stored content, and commit. The content is only
+    removed while this transaction holds the deleted row's lock, so an acquire_blob() of
+    the same content waits for it and then stores the content again.
+    Returns False (and keeps everything) if the blob was referenced again in the meantime.
+    """
+    result = await db.execute(delete(Blob).where(Blob.sha256 == sha256, Blob.refcount <= 0))
+    if not result.rowcount:
+        await db.rollback()
+        return False
+    await blob_store.delete(sha256)
+    await db.commit()
+    return True
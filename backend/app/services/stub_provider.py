@@ -0,0 +1,93 @@
+import asyncio
+import json
+import random
+from typing import Any, Dict, Optional
+
+
+class StubProviderError(RuntimeError):
+    """Injected failure from the stub provider."""
+
+
+# Canned, schema-valid responses keyed by the AI_Service method that asked.
+CANNED_RESPONSES: Dict[str, Any] = {
+    "parse_resume": {
+        "full_name": "Alex Example",
+        "email": "alex@example.com",
+        "phone": "+1 555 0100",
+        "skills": ["Python", "FastAPI", "PostgreSQL", "Docker", "AWS"],
+        "work_experience": [
+            {"company": "Acme Corp", "role": "Backend Engineer", "duration": "2020 - Present",
+             "description": "Built and operated REST services handling 5k rps."},
+            {"company": "Initech", "role": "Software Developer", "duration": "2017 - 2020",
+             "description": "Maintained billing pipelines and internal tooling."},
+        ],
+        "education": [{"institution": "State University", "degree": "BSc Computer Science", "year": "2017"}],
+        "projects": [{"name": "Open Source CLI", "description": "Task runner with 2k GitHub stars."}],
+    },
+    "get_section_suggestions": {
+        "suggestions": [
+            "Led migration of monolith to services, cutting deploy time by 60%",
+            "Designed caching layer that reduced p95 latency from 800ms to 120ms",
+            "Mentored 4 junior engineers through structured code reviews",
+        ],
+        "tips": [
+            "Start every bullet with a strong action verb.",
+            "Quantify impact with %, $ or time saved.",
+        ],
+        "improved_content": "Backend engineer with 7 years of experience building reliable, high-throughput APIs.",
+    },
+    "generate_tailored_resume": {
+        "full_name": "Alex Example",
+        "contact_info": {"email": "alex@example.com", "phone": "+1 555 0100"},
+        "summary": "Backend engineer with 7 years of experience shipping scalable Python services.",
+        "skills": ["Python", "FastAPI", "PostgreSQL", "Redis", "Kubernetes"],
+        "work_experience": [
+            {"company": "Acme Corp", "role": "Backend Engineer", "duration": "2020 - Present",
+             "points": ["Scaled order API to 5k rps with 99.95% availability",
+                        "Cut infrastructure cost 30% by right-sizing clusters"]},
+            {"company": "Initech", "role": "Software Developer", "duration": "2017 - 2020",
+             "points": ["Automated billing reconciliation, saving 20 hours per week"]},
+        ],
+        "education": [{"institution": "State University", "degree": "BSc Computer Science", "year": "2017"}],
+        "projects": [{"name": "Open Source CLI", "description": "Task runner with 2k GitHub stars."}],
+    },
+    "calculate_ats_score": {
+        "score": 82,
+        "match_percentage": 78,
+        "missing_keywords": ["GraphQL", "Terraform"],
+        "feedback": ["Strong backend alignment.", "Add infrastructure-as-code experience."],
+        "improvement_tips": ["Mention Terraform modules you have written."],
+    },
+    "regenerate_section": {
+        "content": "Backend engineer with 7 years building Python and PostgreSQL services on AWS; "
+                   "cut p95 latency 85% and led Docker/Kubernetes migrations.",
+    },
+    "suggest_job_roles": [
+        "Software Engineer", "Software Architect", "Full Stack Developer",
+        "Site Reliability Engineer", "Platform Engineer",
+    ],
+}
+
+
+class StubProvider:
+    """
+    Deterministic offline stand-in for Ollama/Gemini (AI_PROVIDER=stub).
+    Sleeps for latency_ms +/- jitter_ms and fails with probability failure_rate.
+    """
+
+    def __init__(self, latency_ms: float = 0, jitter_ms: float = 0,
+                 failure_rate: float = 0.0, seed: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+
+    async def generate(self, prompt: str, method: str) -> str:
+        delay_ms = self.latency_ms
+        if self.jitter_ms:
+            delay_ms += self._random.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay_ms > 0:
+            await asyncio.sleep(delay_ms / 1000)
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            raise StubProviderError(f"Injected stub failure for {method}")
+        return json.dumps(CANNED_RESPONSES.get(method, {}))
@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import func, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.config import settings
+from app.core.db import SessionLocal
+from app.core.metrics import SUGGESTION_CACHE
+from app.core.state import state
+from app.models.models import JobRole, SectionSuggestion
+from app.services.ai_service import ai_service, parse_failed
+from app.services.scheduler import BACKGROUND, set_caller
+
+logger = logging.getLogger(__name__)
+
+# What the warmer precomputes for each of the top roles
+SECTIONS = ["summary", "skills", "work_experience", "projects", "education"]
+EXPERIENCE_LEVELS = ["Fresher", "Junior", "Mid", "Senior", "Lead"]
+
+CHECK_INTERVAL = 600  # seconds between warmer wake-ups
+LOCK_KEY = "suggestion_warmer:lock"
+
+# Store misses being computed in this process, so concurrent requests share one LLM call
+_inflight: Dict[Tuple[str, str, str], asyncio.Future] = {}
+
+
+def _key(section_name: str, job_role: str, experience_level: str) -> Tuple[str, str, str]:
+    return section_name.strip().lower(), job_role.strip().lower(), experience_level.strip().lower()
+
+
+def _storable(content: Any) -> bool:
+    return isinstance(content, dict) and not parse_failed(content) and bool(content.get("suggestions"))
+
+
+async def lookup(db: AsyncSession, section_name: str, job_role: str, experience_level: str) -> Optional[dict]:
+    section, role, level = _key(section_name, job_role, experience_level)
+    result = await db.execute(
+        select(SectionSuggestion.content).where(
+            SectionSuggestion.section_name == section,
+            SectionSuggestion.job_role == role,
+            SectionSuggestion.experience_level == level,
+            SectionSuggestion.prompt_version == ai_service.suggestion_version))
+    return result.scalar()
+
+
+async def store(db: AsyncSession, section_name: str, job_role: str, experience_level: str, content: dict) -> None:
+    section, role, level = _key(section_name, job_role, experience_level)
+    result = await db.execute(
+        update(SectionSuggestion)
+        .where(SectionSuggestion.section_name == section,
+               SectionSuggestion.job_role == role,
+               SectionSuggestion.experience_level == level)
+        .values(content=content, prompt_version=ai_service.suggestion_version, updated_at=func.now()))
+    if not result.rowcount:
+        db.add(SectionSuggestion(section_name=section, job_role=role, experience_level=level,
+                                 prompt_version=ai_service.suggestion_version, content=content))
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Stored concurrently by another request or the warmer; theirs is as good
+        await db.rollback()
+
+
+async def get_suggestions(db: AsyncSession, section_name: str, job_role: str, experience_level: str,
+                          current_content: Any = None) -> dict:
+    """
+    Suggestions for a section. Without user content the answer depends only on
+    (section, role, level), so it is served from the store and written back on a miss.
+    Concurrent misses for the same key in this process share one LLM call.
+    """
+    if current_content:
+        SUGGESTION_CACHE.labels("live").inc()
+        return await ai_service.get_section_suggestions(
+            section_name=section_name, job_role=job_role,
+            experience_level=experience_level, current_content=current_content)
+
+    key = _key(section_name, job_role, experience_level)
+    pending = _inflight.get(key)
+    if pending is None:
+        cached = await lookup(db, section_name, job_role, experience_level)
+        if cached is not None:
+            SUGGESTION_CACHE.labels("hit").inc()
+            return cached
+        # Another request may have missed while the lookup was running
+        pending = _inflight.get(key)
+    if pending is not None:
+        SUGGESTION_CACHE.labels("joined").inc()
+        return await asyncio.shield(pending)
+
+    SUGGESTION_CACHE.labels("miss").inc()
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        suggestions = await ai_service.get_section_suggestions(
+            section_name=section_name, job_role=job_role, experience_level=experience_level)
+        if _storable(suggestions):
+            await store(db, section_name, job_role, experience_level, suggestions)
+        future.set_result(suggestions)
+        return suggestions
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Often nobody joined; retrieve it so asyncio doesn't log it as never retrieved
+        future.exception()
+        raise
+    finally:
+        _inflight.pop(key, None)
+
+
+def in_off_peak(now: Optional[datetime] = None) -> bool:
+    hour = (now or datetime.now(timezone.utc)).hour
+    start, end = settings.SUGGESTION_WARM_START_HOUR, settings.SUGGESTION_WARM_END_HOUR
+    if start <= end:
+        return start <= hour < end
+    return hour >= start or hour < end  # Window wraps midnight
+
+
+async def warm(top_roles: int, respect_window: bool = True) -> int:
+    """
+    Precompute suggestions for the most popular roles x levels x sections, skipping
+    entries refreshed within SUGGESTION_REFRESH_HOURS. Returns how many were (re)computed.
+    """
+    # Provider calls queue behind interactive traffic
+    set_caller("suggestion-warmer", BACKGROUND)
+    warmed = 0
+    async with SessionLocal() as db:
+        result = await db.execute(
+            select(JobRole.name).order_by(JobRole.popularity.desc(), JobRole.id).limit(top_roles))
+        roles = result.scalars().all()
+        fresh_after = datetime.now(timezone.utc) - timedelta(hours=settings.SUGGESTION_REFRESH_HOURS)
+        result = await db.execute(
+            select(SectionSuggestion.section_name, SectionSuggestion.job_role, SectionSuggestion.experience_level)
+            .where(SectionSuggestion.prompt_version == ai_service.suggestion_version,
+                   SectionSuggestion.updated_at >= fresh_after))
+        fresh = {tuple(row) for row in result.all()}
+
+        for role in roles:
+            for level in EXPERIENCE_LEVELS:
+                for section in SECTIONS:
+                    if _key(section, role, level) in fresh:
+                        continue
+                    if respect_window and not in_off_peak():
+                        logger.info("Off-peak window closed; suggestion warming paused after %d entries", warmed)
+                        return warmed
+                    try:
+                        suggestions = await ai_service.get_section_suggestions(
+                            section_name=section, job_role=role, experience_level=level)
+                    except Exception:
+                        logger.exception("Warming suggestions failed for %s / %s / %s", role, level, section)
+                        continue
+                    if _storable(suggestions):
+                        await store(db, section, role, level, suggestions)
+                        warmed += 1
+    return warmed
+
+
+async def run_warmer() -> None:
+    """Warm during the off-peak window. With several workers, a shared lock picks one."""
+    window_hours = (settings.SUGGESTION_WARM_END_HOUR - settings.SUGGESTION_WARM_START_HOUR) % 24 or 24
+    while True:
+        try:
+            if in_off_peak() and await state.set_nx(LOCK_KEY, str(os.getpid()), ttl=window_hours * 3600):
+                try:
+                    warmed = await warm(settings.SUGGESTION_WARM_TOP_ROLES)
+                    if warmed:
+                        logger.info("Warmed %d section suggestion entries", warmed)
+                finally:
+                    await state.delete(LOCK_KEY)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Suggestion warmer run failed")
+        await asyncio.sleep(CHECK_INTERVAL)
@@ -0,0 +1,66 @@
+"""
+Deterministic resume fixtures of varying sizes for the benchmarks.
+Files are generated on first use into bench/fixtures/ (gitignored).
+"""
+import os
+from typing import List, Tuple
+
+import docx
+from fpdf import FPDF
+from fpdf.enums import XPos, YPos
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# name -> number of experience blocks; roughly one PDF page per 6 blocks
+SIZES = {"small": 3, "medium": 18, "large": 60}
+
+PDF_TYPE = "application/pdf"
+DOCX_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+def _paragraphs(blocks: int) -> List[str]:
+    lines = [
+        "Alex Example",
+        "alex@example.com | +1 555 0100 | Berlin",
+        "Summary: Backend engineer focused on reliable, high-throughput Python services.",
+        "Skills: Python, FastAPI, PostgreSQL, Redis, Docker, Kubernetes, AWS, Terraform",
+    ]
+    for i in range(blocks):
+        lines.append(f"Company {i} - Senior Engineer ({2000 + i % 24} - {2001 + i % 24})")
+        lines.append(
+            f"Delivered project {i}: cut p95 latency by {10 + i % 50}% and saved "
+            f"${(i + 1) * 1000} per month by consolidating {i % 7 + 2} services."
+        )
+    lines.append("Education: BSc Computer Science, State University, 2017")
+    return lines
+
+
+def _write_pdf(path: str, blocks: int):
+    pdf = FPDF(format="A4")
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+    pdf.set_font("Helvetica", "", 10)
+    for text in _paragraphs(blocks):
+        pdf.multi_cell(0, 5, text, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+    pdf.output(path)
+
+
+def _write_docx(path: str, blocks: int):
+    document = docx.Document()
+    for text in _paragraphs(blocks):
+        document.add_paragraph(text)
+    document.save(path)
+
+
+def ensure_fixtures() -> List[Tuple[str, str, str]]:
+    """Return (path, filename, content_type) for every fixture, generating missing ones."""
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    fixtures = []
+    for size, blocks in SIZES.items():
+        for ext, writer, content_type in (("pdf", _write_pdf, PDF_TYPE), ("docx", _write_docx, DOCX_TYPE)):
+            filename = f"resume-{size}.{ext}"
+            path = os.path.join(FIXTURE_DIR, filename)
+            if not os.path.exists(path):
+                writer(path, blocks)
+            fixtures.append((path, filename, content_type))
+    return fixtures
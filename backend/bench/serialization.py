@@ -0,0 +1,120 @@
+"""
+Micro-benchmark for the JSON hot paths: response rendering, JSON column
+round-trips and response compression, on representative resume payloads.
+
+    cd backend
+    python -m bench.serialization
+"""
+import gzip
+import json
+import os
+import sys
+import timeit
+from datetime import datetime
+from typing import Any, Callable, Dict
+
+import brotli
+from starlette.responses import JSONResponse
+
+from app.core.serialization import ORJSONResponse, json_dumps, json_loads
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# name -> (work_experience entries, bullets per entry, projects)
+SIZES = {"small": (2, 3, 1), "medium": (8, 6, 4), "large": (30, 10, 15)}
+
+
+def make_payload(jobs: int, bullets: int, projects: int) -> Dict[str, Any]:
+    """Shape of Application.generated_content / ApplicationResponse."""
+    return {
+        "id": 1,
+        "status": "completed",
+        "template_id": "modern-ats",
+        "created_at": "2026-01-01T00:00:00+00:00",
+        "ats_score": 82,
+        "ats_feedback": {
+            "score": 82, "match_percentage": 78,
+            "missing_keywords": [f"keyword-{i}" for i in range(20)],
+            "feedback": [f"Feedback item {i} about alignment with the job description." for i in range(8)],
+            "improvement_tips": [f"Tip {i}: quantify the impact of your work." for i in range(8)],
+        },
+        "generated_content": {
+            "full_name": "Alex Example",
+            "contact_info": {"email": "alex@example.com", "phone": "+1 555 0100", "location": "Berlin"},
+            "summary": "Backend engineer with a decade of experience building reliable services. " * 4,
+            "skills": [f"Skill {i}" for i in range(40)],
+            "work_experience": [
+                {
+                    "company": f"Company {j}",
+                    "role": "Senior Backend Engineer",
+                    "duration": f"{2000 + j} - {2001 + j}",
+                    "points": [
+                        f"Reduced p95 latency of service {j}.{b} by {10 + b}% through caching "
+                        f"and query tuning, saving ${1000 * (b + 1)} per month."
+                        for b in range(bullets)
+                    ],
+                }
+                for j in range(jobs)
+            ],
+            "education": [{"institution": "State University", "degree": "BSc Computer Science", "year": "2017"}],
+            "projects": [
+                {"name": f"Project {p}", "description": "Open-source tool used by thousands of developers. " * 2}
+                for p in range(projects)
+            ],
+        },
+    }
+
+
+def _time(fn: Callable[[], Any]) -> float:
+    """Best-of-5 mean seconds per call."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=5, number=number)) / number
+
+
+def run() -> Dict[str, Any]:
+    stdlib_response = JSONResponse.__new__(JSONResponse)
+    fast_response = ORJSONResponse.__new__(ORJSONResponse)
+    results: Dict[str, Any] = {}
+
+    for name, shape in SIZES.items():
+        payload = make_payload(*shape)
+        encoded = json.dumps(payload)
+        body = fast_response.render(payload)
+
+        timings = {
+            "response_stdlib_us": _time(lambda: stdlib_response.render(payload)),
+            "response_orjson_us": _time(lambda: fast_response.render(payload)),
+            "column_dump_stdlib_us": _time(lambda: json.dumps(payload)),
+            "column_dump_orjson_us": _time(lambda: json_dumps(payload)),
+            "column_load_stdlib_us": _time(lambda: json.loads(encoded)),
+            "column_load_orjson_us": _time(lambda: json_loads(encoded)),
+            "gzip6_us": _time(lambda: gzip.compress(body, compresslevel=6)),
+            "brotli4_us": _time(lambda: brotli.compress(body, quality=4)),
+        }
+        entry = {k: round(v * 1e6, 2) for k, v in timings.items()}
+        entry["bytes_raw"] = len(body)
+        entry["bytes_gzip6"] = len(gzip.compress(body, compresslevel=6))
+        entry["bytes_brotli4"] = len(brotli.compress(body, quality=4))
+        entry["response_speedup"] = round(timings["response_stdlib_us"] / timings["response_orjson_us"], 2)
+        entry["column_dump_speedup"] = round(timings["column_dump_stdlib_us"] / timings["column_dump_orjson_us"], 2)
+        entry["column_load_speedup"] = round(timings["column_load_stdlib_us"] / timings["column_load_orjson_us"], 2)
+        results[name] = entry
+    return results
+
+
+def main(argv=None):
+    results = run()
+    print(f"{'payload':<8}{'bytes':>9}{'render x':>10}{'dump x':>9}{'load x':>9}{'gzip':>9}{'brotli':>9}")
+    for name, r in results.items():
+        print(f"{name:<8}{r['bytes_raw']:>9}{r['response_speedup']:>10}{r['column_dump_speedup']:>9}"
+              f"{r['column_load_speedup']:>9}{r['bytes_gzip6']:>9}{r['bytes_brotli4']:>9}")
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out = os.path.join(RESULTS_DIR, f"serialization-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"results written to {out}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,47 @@
+"""
+Production server: gunicorn supervising uvicorn workers.
+
+    gunicorn -c gunicorn.conf.py app.main:app
+"""
+import multiprocessing
+import os
+import shutil
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+# The app is async and I/O bound, so one worker per core saturates the CPU
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "app.core.server.AppWorker"
+# Import the app once in the master so workers fork with warm modules
+preload_app = True
+backlog = int(os.getenv("BACKLOG", "2048"))
+# Longer than the usual 60s load balancer idle timeout, so the LB closes first
+keepalive = int(os.getenv("KEEPALIVE", "75"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "60"))
+
+# Per-worker metric files, aggregated by /metrics
+metrics_dir = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus-multiproc")
+shutil.rmtree(metrics_dir, ignore_errors=True)
+os.makedirs(metrics_dir, exist_ok=True)
+
+# Tables are created once in the master (on_starting) so booting workers don't race on
+# DDL. Set before the app is imported, so worker settings see it with or without preload.
+os.environ["CREATE_TABLES"] = "false"
+
+
+def on_starting(server):
+    import asyncio
+    from app.core.db import create_tables, engine
+
+    async def prepare():
+        await create_tables()
+        # Don't hand pooled connections down to forked workers
+        await engine.dispose()
+
+    asyncio.run(prepare())
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,74 @@
+import os
+import tempfile
+import time
+
+import pytest
+
+# Settings are read at import time, so configure an offline app before importing it:
+# SQLite instead of Postgres, the stub LLM and embedder, and scratch directories.
+_tmp = tempfile.mkdtemp(prefix="resume-tests-")
+os.environ.update(
+    SECRET_KEY="test-secret",
+    POSTGRES_USER="test",
+    POSTGRES_PASSWORD="test",
+    POSTGRES_SERVER="localhost",
+    POSTGRES_DB="test",
+    SQLALCHEMY_DATABASE_URI=f"sqlite+aiosqlite:///{_tmp}/test.db",
+    AI_PROVIDER="stub",
+    STUB_LATENCY_MS="0",
+    STUB_JITTER_MS="0",
+    EMBEDDING_PROVIDER="stub",
+    EMBEDDING_INDEX_DIR=os.path.join(_tmp, "embeddings"),
+    BLOB_DIR=os.path.join(_tmp, "blobs"),
+    PDF_CACHE_DIR=os.path.join(_tmp, "render_cache"),
+    STORAGE_BACKEND="local",
+    STATE_BACKEND="memory",
+    SUGGESTION_WARM_TOP_ROLES="0",
+    # Every test runs under the blocking guard: a handler that holds the loop fails its test
+    LOOP_STRICT_MS="200",
+)
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.main import app  # noqa: E402
+
+API = "/api/v1"
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture(scope="session")
+def auth_headers(client):
+    client.post(f"{API}/auth/signup",
+                json={"email": "tester@example.com", "password": "pw", "full_name": "Tester"})
+    response = client.post(f"{API}/auth/login",
+                           data={"username": "tester@example.com", "password": "pw"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def run(client):
+    """Run a coroutine function on the app's event loop (the engine's connections live there)."""
+    return lambda fn, *args: client.portal.call(fn, *args)
+
+
+def create_resume_and_job(client, auth_headers):
+    resume = client.post(f"{API}/resume/scratch", headers=auth_headers,
+                         json={"job_role": "Backend Engineer", "experience_level": "Mid", "industry": "IT"})
+    job = client.post(f"{API}/resume/job", headers=auth_headers,
+                      json={"text_content": "Python, FastAPI and PostgreSQL backend role"})
+    return resume.json()["id"], job.json()["id"]
+
+
+def wait_for_status(client, auth_headers, app_id, status, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        body = client.get(f"{API}/resume/application/{app_id}", headers=auth_headers).json()
+        if body["status"] == status:
+            return body
+        time.sleep(0.05)
+    raise AssertionError(f"application {app_id} never reached {status!r}")
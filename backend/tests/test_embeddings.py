@@ -0,0 +1,50 @@
+import asyncio
+
+import numpy as np
+
+from app.services.embeddings import VectorIndex
+
+
+def _unit(dim: int, hot: int) -> np.ndarray:
+    vector = np.zeros((1, dim), dtype=np.float32)
+    vector[0, hot] = 1.0
+    return vector
+
+
+def test_append_after_crash_keeps_ids_aligned(tmp_path):
+    index = VectorIndex(str(tmp_path), "roles", "test-model")
+    asyncio.run(index.add([1, 2], ["one", "two"], np.vstack([_unit(8, 1), _unit(8, 2)])))
+
+    # A crash between the vector append and the sidecar write leaves an unrecorded row
+    with open(index.data_path, "ab") as f:
+        f.write(_unit(8, 7).tobytes())
+
+    asyncio.run(index.add([3], ["three"], _unit(8, 3)))
+    reopened = VectorIndex(str(tmp_path), "roles", "test-model")
+    assert [hit[0] for hit in reopened.search(_unit(8, 3)[0], k=1)] == [3]
+    assert [hit[0] for hit in reopened.search(_unit(8, 1)[0], k=1)] == [1]
+
+
+def test_truncated_vectors_reset_the_index(tmp_path):
+    index = VectorIndex(str(tmp_path), "roles", "test-model")
+    asyncio.run(index.add([1, 2], ["one", "two"], np.vstack([_unit(8, 1), _unit(8, 2)])))
+    with open(index.data_path, "r+b") as f:
+        f.truncate(8 * 4)
+
+    reopened = VectorIndex(str(tmp_path), "roles", "test-model")
+    assert len(reopened) == 0
+    assert reopened.missing([1, 2]) == [1, 2]
+
+
+def test_append_swaps_in_a_new_view(tmp_path):
+    index = VectorIndex(str(tmp_path), "roles", "test-model")
+    asyncio.run(index.add([1], ["one"], _unit(8, 1)))
+
+    # Built off the loop; searches keep the old view until add() swaps the result in
+    rows = index._add_sync([2], ["two"], _unit(8, 2))
+    assert index.ids == [1]
+    assert [hit[0] for hit in index.search(_unit(8, 2)[0], k=2)] == [1]
+    assert rows.ids == [1, 2]
+
+    index.refresh()
+    assert [hit[0] for hit in index.search(_unit(8, 2)[0], k=1)] == [2]
@@ -0,0 +1,131 @@
+import asyncio
+import time
+
+from app.api import resume as resume_api
+from app.core.config import settings
+from app.core.db import SessionLocal
+from app.models.models import Application
+from app.services import ai_service as ai_service_module
+from conftest import API, create_resume_and_job, wait_for_status
+
+
+def test_requeued_generation_resumed_by_sweeper(client, auth_headers, run, monkeypatch):
+    resume_id, job_id = create_resume_and_job(client, auth_headers)
+    app_id = client.post(f"{API}/resume/generate", headers=auth_headers,
+                         json={"resume_id": resume_id, "job_id": job_id, "regenerate": True}).json()["id"]
+    wait_for_status(client, auth_headers, app_id, "completed")
+
+    async def requeue():
+        # As left behind by a worker that shut down mid-generation
+        async with SessionLocal() as db:
+            application = await db.get(Application, app_id)
+            application.status = "queued"
+            await db.commit()
+
+    run(requeue)
+    monkeypatch.setattr(settings, "REQUEUE_SWEEP_INTERVAL", 0.05)
+
+    async def start_sweeper():
+        return asyncio.ensure_future(resume_api.run_requeue_sweeper())
+
+    sweeper = run(start_sweeper)
+    try:
+        wait_for_status(client, auth_headers, app_id, "completed")
+    finally:
+        client.portal.call(sweeper.cancel)
+
+
+def test_regenerate_section_without_content_is_bad_gateway(client, auth_headers, monkeypatch):
+    resume_id, job_id = create_resume_and_job(client, auth_headers)
+    app_id = client.post(f"{API}/resume/generate", headers=auth_headers,
+                         json={"resume_id": resume_id, "job_id": job_id}).json()["id"]
+    wait_for_status(client, auth_headers, app_id, "completed")
+
+    stub = resume_api.ai_service.stub
+    real_generate = stub.generate
+
+    async def no_content(prompt, method):
+        if method == "regenerate_section":
+            return '{"text": "missing the content key"}'
+        return await real_generate(prompt, method)
+
+    monkeypatch.setattr(stub, "generate", no_content)
+    started = time.monotonic()
+    response = client.post(f"{API}/resume/application/{app_id}/regenerate-section",
+                           headers=auth_headers, json={"section_name": "summary"})
+    assert response.status_code == 502
+    assert "no usable content" in response.json()["detail"]
+    assert time.monotonic() - started < 2  # Not retried with backoff
+
+
+def test_regenerated_entry_must_keep_its_shape(client, auth_headers, monkeypatch):
+    resume_id, job_id = create_resume_and_job(client, auth_headers)
+    app_id = client.post(f"{API}/resume/generate", headers=auth_headers,
+                         json={"resume_id": resume_id, "job_id": job_id}).json()["id"]
+    before = wait_for_status(client, auth_headers, app_id, "completed")
+    assert isinstance(before["generated_content"]["work_experience"][0], dict)
+
+    stub = resume_api.ai_service.stub
+    real_generate = stub.generate
+
+    async def bare_string(prompt, method):
+        if method == "regenerate_section":
+            return '{"content": "Backend Engineer at Acme Corp"}'
+        return await real_generate(prompt, method)
+
+    monkeypatch.setattr(stub, "generate", bare_string)
+    response = client.post(f"{API}/resume/application/{app_id}/regenerate-section", headers=auth_headers,
+                           json={"section_name": "work_experience", "index": 0})
+    assert response.status_code == 502
+
+    after = client.get(f"{API}/resume/application/{app_id}", headers=auth_headers).json()
+    assert after["generated_content"] == before["generated_content"]
+    assert after["revision"] == before["revision"]
+
+
+def _count_generations(monkeypatch):
+    calls = []
+    stub = resume_api.ai_service.stub
+    real_generate = stub.generate
+
+    async def counting(prompt, method):
+        if method == "generate_tailored_resume":
+            calls.append(method)
+        return await real_generate(prompt, method)
+
+    monkeypatch.setattr(stub, "generate", counting)
+    return calls
+
+
+def _generate(client, auth_headers, resume_id, job_id, **extra):
+    response = client.post(f"{API}/resume/generate", headers=auth_headers,
+                           json={"resume_id": resume_id, "job_id": job_id, **extra})
+    assert response.status_code == 202
+    return wait_for_status(client, auth_headers, response.json()["id"], "completed")
+
+
+def test_identical_generation_reuses_the_result(client, auth_headers, monkeypatch):
+    calls = _count_generations(monkeypatch)
+    resume_id, job_id = create_resume_and_job(client, auth_headers)
+    first = _generate(client, auth_headers, resume_id, job_id)
+    assert len(calls) == 1
+
+    second = _generate(client, auth_headers, resume_id, job_id)
+    assert len(calls) == 1
+    assert second["id"] != first["id"]
+    assert second["generated_content"] == first["generated_content"]
+
+    # Explicit regeneration skips the memo
+    _generate(client, auth_headers, resume_id, job_id, regenerate=True)
+    assert len(calls) == 2
+
+
+def test_prompt_change_invalidates_reuse(client, auth_headers, monkeypatch):
+    calls = _count_generations(monkeypatch)
+    resume_id, job_id = create_resume_and_job(client, auth_headers)
+    _generate(client, auth_headers, resume_id, job_id)
+    assert len(calls) == 1
+
+    monkeypatch.setattr(ai_service_module, "GENERATION_PROMPT_HASH", "edited-prompt")
+    _generate(client, auth_headers, resume_id, job_id)
+    assert len(calls) == 2
@@ -0,0 +1,59 @@
+from conftest import API, create_resume_and_job, wait_for_status
+
+
+def _revalidate(client, url, headers, etag):
+    return client.get(url, headers={**headers, "If-None-Match": etag})
+
+
+def test_templates_revalidate(client):
+    first = client.get(f"{API}/resume/templates")
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"].startswith("public")
+
+    again = _revalidate(client, f"{API}/resume/templates", {}, etag)
+    assert again.status_code == 304
+    assert again.headers["ETag"] == etag
+    assert again.content == b""
+
+
+def test_resume_etag_changes_with_its_version(client, auth_headers):
+    resume_id, _ = create_resume_and_job(client, auth_headers)
+    url = f"{API}/resume/{resume_id}"
+    etag = client.get(url, headers=auth_headers).headers["ETag"]
+    assert _revalidate(client, url, auth_headers, etag).status_code == 304
+
+    client.patch(f"{url}/update-section", headers=auth_headers,
+                 json={"section_name": "summary", "content": "Edited summary"})
+    changed = _revalidate(client, url, auth_headers, etag)
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert changed.json()["parsed_content"]["summary"] == "Edited summary"
+
+
+def test_application_etag_changes_with_status_and_revision(client, auth_headers):
+    resume_id, job_id = create_resume_and_job(client, auth_headers)
+    app_id = client.post(f"{API}/resume/generate", headers=auth_headers,
+                         json={"resume_id": resume_id, "job_id": job_id, "regenerate": True}).json()["id"]
+    wait_for_status(client, auth_headers, app_id, "completed")
+    url = f"{API}/resume/application/{app_id}"
+
+    etag = client.get(url, headers=auth_headers).headers["ETag"]
+    assert _revalidate(client, url, auth_headers, etag).status_code == 304
+
+    client.post(f"{url}/regenerate-section", headers=auth_headers, json={"section_name": "summary"})
+    changed = _revalidate(client, url, auth_headers, etag)
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_other_users_resume_is_not_revalidated(client, auth_headers):
+    resume_id, _ = create_resume_and_job(client, auth_headers)
+    url = f"{API}/resume/{resume_id}"
+    etag = client.get(url, headers=auth_headers).headers["ETag"]
+
+    client.post(f"{API}/auth/signup",
+                json={"email": "other@example.com", "password": "pw", "full_name": "Other"})
+    token = client.post(f"{API}/auth/login",
+                        data={"username": "other@example.com", "password": "pw"}).json()["access_token"]
+    other = {"Authorization": f"Bearer {token}"}
+    assert _revalidate(client, url, other, etag).status_code == 404
@@ -0,0 +1,156 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+from pydantic import BaseModel
+from sqlalchemy import func
+from sqlalchemy.future import select
+
+from app.core.config import settings
+from app.core.db import SessionLocal
+from app.models.models import Application, IdempotencyKey
+from app.services.idempotency import idempotent
+from conftest import API, create_resume_and_job
+
+
+class _Body(BaseModel):
+    id: int
+
+
+async def _application_count() -> int:
+    async with SessionLocal() as db:
+        return (await db.execute(select(func.count(Application.id)))).scalar()
+
+
+def test_retry_replays_original_response(client, auth_headers, run):
+    resume_id, job_id = create_resume_and_job(client, auth_headers)
+    headers = {**auth_headers, "Idempotency-Key": str(uuid.uuid4())}
+    body = {"resume_id": resume_id, "job_id": job_id, "regenerate": True}
+
+    first = client.post(f"{API}/resume/generate", headers=headers, json=body)
+    count = run(_application_count)
+    retry = client.post(f"{API}/resume/generate", headers=headers, json=body)
+
+    assert first.status_code == retry.status_code == 202
+    assert retry.json()["id"] == first.json()["id"]
+    assert retry.headers.get("Idempotent-Replayed") == "true"
+    assert run(_application_count) == count
+
+
+def test_key_reused_with_different_body_is_rejected(client, auth_headers):
+    resume_id, job_id = create_resume_and_job(client, auth_headers)
+    headers = {**auth_headers, "Idempotency-Key": str(uuid.uuid4())}
+    client.post(f"{API}/resume/generate", headers=headers,
+                json={"resume_id": resume_id, "job_id": job_id, "regenerate": True})
+    response = client.post(f"{API}/resume/generate", headers=headers,
+                           json={"resume_id": resume_id, "job_id": job_id, "template_id": "academic"})
+    assert response.status_code == 422
+
+
+def test_concurrent_duplicate_waits_for_and_replays_the_first(run):
+    key = str(uuid.uuid4())
+    order = []
+
+    async def attempt(name: str, delay: float):
+        async with idempotent("test", 1, key, "fp") as request:
+            if request.replay is not None:
+                order.append((name, "replayed"))
+                return request.replay.body
+            order.append((name, "claimed"))
+            await asyncio.sleep(delay)
+            async with SessionLocal() as db:
+                await request.complete(db, 200, _Body(id=7))
+                await db.commit()
+            return None
+
+    async def both():
+        first = asyncio.ensure_future(attempt("first", 0.3))
+        await asyncio.sleep(0.05)
+        return await asyncio.gather(first, attempt("second", 0))
+
+    _, replayed = run(both)
+    assert order == [("first", "claimed"), ("second", "replayed")]
+    assert b'"id":7' in replayed
+
+
+def test_failed_attempt_releases_the_key(run):
+    key = str(uuid.uuid4())
+
+    async def failing():
+        async with idempotent("test", 1, key, "fp"):
+            raise RuntimeError("handler failed")
+
+    async def retry():
+        async with idempotent("test", 1, key, "fp") as request:
+            return request.record_id, request.replay
+
+    with pytest.raises(RuntimeError):
+        run(failing)
+    record_id, replay = run(retry)
+    assert record_id is not None and replay is None
+
+
+def test_duplicate_gives_up_with_409_while_first_is_running(run, monkeypatch):
+    monkeypatch.setattr(settings, "IDEMPOTENCY_WAIT_SECONDS", 0.2)
+    key = str(uuid.uuid4())
+
+    async def overlapping():
+        async with idempotent("test", 1, key, "fp"):
+            with pytest.raises(HTTPException) as excinfo:
+                async with idempotent("test", 1, key, "fp"):
+                    pass
+            return excinfo.value
+
+    error = run(overlapping)
+    assert error.status_code == 409
+    assert error.headers["Retry-After"] == "1"
+
+
+def test_abandoned_claim_is_taken_over_after_its_lease(run):
+    key = str(uuid.uuid4())
+
+    async def crashed_claim():
+        # What a worker killed between claim and completion leaves behind
+        async with SessionLocal() as db:
+            now = datetime.now(timezone.utc)
+            db.add(IdempotencyKey(user_id=1, key=key, fingerprint="fp", status="in_progress",
+                                  claim_token="dead-worker", lease_expires_at=now - timedelta(seconds=1),
+                                  expires_at=now + timedelta(hours=1)))
+            await db.commit()
+
+    async def retry():
+        started = asyncio.get_event_loop().time()
+        async with idempotent("test", 1, key, "fp") as request:
+            async with SessionLocal() as db:
+                await request.complete(db, 200, _Body(id=9))
+                await db.commit()
+            return request.record_id, asyncio.get_event_loop().time() - started
+
+    run(crashed_claim)
+    record_id, waited = run(retry)
+    assert record_id is not None
+    assert waited < 1
+
+    async def replay():
+        async with idempotent("test", 1, key, "fp") as request:
+            return request.replay.body
+
+    assert b'"id":9' in run(replay)
+
+
+def test_running_claim_keeps_its_lease(run, monkeypatch):
+    monkeypatch.setattr(settings, "IDEMPOTENCY_LEASE_SECONDS", 0.3)
+    monkeypatch.setattr(settings, "IDEMPOTENCY_WAIT_SECONDS", 0.8)
+    key = str(uuid.uuid4())
+
+    async def slow_first_and_duplicate():
+        async with idempotent("test", 1, key, "fp"):
+            with pytest.raises(HTTPException) as excinfo:
+                async with idempotent("test", 1, key, "fp"):
+                    pass
+            return excinfo.value
+
+    # The renewed lease never lapses, so the duplicate waits and gives up instead of taking over
+    assert run(slow_first_and_duplicate).status_code == 409
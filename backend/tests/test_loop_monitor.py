@@ -0,0 +1,56 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.core.loop_monitor import LoopBlocked, loop_monitor
+from app.main import app
+
+
+@pytest.fixture
+def temporary_route():
+    added = []
+
+    def add(path, endpoint):
+        app.add_api_route(path, endpoint)
+        added.append(app.router.routes[-1])
+
+    yield add
+    for route in added:
+        app.router.routes.remove(route)
+
+
+def test_monitor_runs_in_strict_mode(client):
+    assert loop_monitor.running
+    assert loop_monitor.strict > 0
+
+
+def test_blocking_handler_fails_under_strict_mode(client, run, temporary_route):
+    async def blocking():
+        time.sleep(loop_monitor.strict * 3)
+        return {"ok": True}
+
+    temporary_route("/_test/blocking", blocking)
+    with pytest.raises(LoopBlocked):
+        client.get("/_test/blocking")
+
+    async def get_without_raising():
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+            return await c.get("/_test/blocking")
+
+    response = run(get_without_raising)
+    assert response.status_code == 500
+    assert response.text == "Handler blocked the event loop"
+
+
+def test_awaiting_handler_passes_under_strict_mode(client, temporary_route):
+    async def waiting():
+        await asyncio.sleep(loop_monitor.strict * 3)
+        return {"ok": True}
+
+    temporary_route("/_test/waiting", waiting)
+    response = client.get("/_test/waiting")
+    assert response.status_code == 200
+    assert response.json() == {"ok": True}
@@ -0,0 +1,65 @@
+import asyncio
+import os
+
+from app.core.config import settings
+from app.services import renderer
+from app.services.renderer import PDFRenderer, RenderCache
+
+
+def _commit(cache: RenderCache, key: str, size: int) -> str:
+    tmp = cache.tmp_path()
+    with open(tmp, "wb") as f:
+        f.write(b"x" * size)
+    return cache.commit(key, tmp, size)
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = RenderCache(str(tmp_path), max_bytes=100)
+    _commit(cache, "a", 40)
+    _commit(cache, "b", 40)
+    assert cache.get("a")  # Now more recent than b
+
+    _commit(cache, "c", 40)
+    assert cache.get("b") is None
+    assert not os.path.exists(cache.path_for("b"))
+    assert cache.get("a") and cache.get("c")
+
+
+def test_cache_index_is_seeded_from_disk(tmp_path):
+    first = RenderCache(str(tmp_path), max_bytes=100)
+    _commit(first, "a", 60)
+
+    # A restarted process counts the existing file against the limit
+    second = RenderCache(str(tmp_path), max_bytes=100)
+    _commit(second, "b", 60)
+    assert second.get("a") is None
+    assert second.get("b")
+
+
+def test_concurrent_renders_of_same_content_share_one(tmp_path, run, monkeypatch):
+    monkeypatch.setattr(settings, "PDF_CACHE_DIR", str(tmp_path))
+    pdf_renderer = PDFRenderer()
+    # Render in threads so the patched renderer is the one that runs
+    monkeypatch.setattr(pdf_renderer, "_get_executor", lambda: None)
+    renders = []
+    real_render = renderer._render_to_file
+
+    def counting(content, template_id, out_path):
+        renders.append(template_id)
+        return real_render(content, template_id, out_path)
+
+    monkeypatch.setattr(renderer, "_render_to_file", counting)
+    content = {"full_name": "Alex Example", "summary": "Backend engineer."}
+
+    async def burst():
+        return await asyncio.gather(*(pdf_renderer.render(content, "modern-ats") for _ in range(3)))
+
+    paths = run(burst)
+    assert len(renders) == 1
+    assert len(set(paths)) == 1
+    with open(paths[0], "rb") as f:
+        assert f.read(4) == b"%PDF"
+
+    # Rendered once, then served from the cache
+    run(pdf_renderer.render, content, "modern-ats")
+    assert len(renders) == 1
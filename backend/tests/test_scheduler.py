@@ -0,0 +1,98 @@
+import asyncio
+import uuid
+
+import pytest
+from starlette.requests import Request
+
+from app.api import deps
+from app.services.scheduler import (
+    BACKGROUND, INTERACTIVE, FairScheduler, SchedulerRejected, set_caller
+)
+
+
+def _scheduler(**overrides) -> FairScheduler:
+    options = dict(slots=1, caller_concurrency=1, tokens_per_minute=0,
+                   queue_budgets={INTERACTIVE: None, BACKGROUND: None})
+    options.update(overrides)
+    return FairScheduler(**options)
+
+
+async def _run_calls(scheduler: FairScheduler, calls):
+    """Queue (caller, priority) calls behind a held slot; returns the order they ran in."""
+    order = []
+    gate = asyncio.Event()
+
+    async def call(caller, priority, label):
+        set_caller(caller, priority)
+        async with scheduler.slot(100):
+            order.append(label)
+            await asyncio.sleep(0.01)
+
+    async def hold():
+        set_caller("holder")
+        async with scheduler.slot(100):
+            await gate.wait()
+
+    holder = asyncio.ensure_future(hold())
+    await asyncio.sleep(0)
+    tasks = []
+    for caller, priority, label in calls:
+        tasks.append(asyncio.ensure_future(call(caller, priority, label)))
+        await asyncio.sleep(0)  # Enqueue in this order
+    gate.set()
+    await asyncio.gather(holder, *tasks)
+    return order
+
+
+def test_callers_are_interleaved(run):
+    calls = [("user:a", INTERACTIVE, "a1"), ("user:a", INTERACTIVE, "a2"), ("user:a", INTERACTIVE, "a3"),
+             ("user:b", INTERACTIVE, "b1"), ("user:b", INTERACTIVE, "b2")]
+    order = run(_run_calls, _scheduler(), calls)
+    assert order == ["a1", "b1", "a2", "b2", "a3"]
+
+
+def test_interactive_runs_before_background(run):
+    calls = [("user:a", BACKGROUND, "background"), ("user:b", INTERACTIVE, "interactive")]
+    assert run(_run_calls, _scheduler(), calls) == ["interactive", "background"]
+
+
+def test_interactive_call_over_quota_is_rejected(run):
+    scheduler = _scheduler(tokens_per_minute=150)
+    caller = f"user:{uuid.uuid4().hex}"
+
+    async def two_calls():
+        set_caller(caller)
+        async with scheduler.slot(100):
+            pass
+        async with scheduler.slot(100):
+            pass
+
+    with pytest.raises(SchedulerRejected) as excinfo:
+        run(two_calls)
+    assert excinfo.value.status_code == 429
+    assert excinfo.value.retry_after >= 1
+
+
+def test_anonymous_clients_get_separate_buckets(run):
+    # Two slots, one per caller: distinct client addresses run side by side,
+    # while calls from one address queue behind each other
+    scheduler = _scheduler(slots=2)
+
+    async def overlap(hosts):
+        running, peak = 0, 0
+
+        async def call(host):
+            nonlocal running, peak
+            scope = {"type": "http", "client": (host, 50000), "headers": []}
+            await deps.get_client_caller(Request(scope))
+            async with scheduler.slot(100):
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*(call(host) for host in hosts))
+        return peak
+
+    assert run(overlap, ["203.0.113.1", "203.0.113.2"]) == 2
+    assert run(overlap, ["203.0.113.1", "203.0.113.1"]) == 1
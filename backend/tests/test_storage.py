@@ -0,0 +1,127 @@
+import os
+import uuid
+
+import pytest
+from fpdf import FPDF
+
+from app.core.db import SessionLocal
+from app.models.models import Blob
+from app.services.storage import acquire_blob, blob_store, collect_blob, release_blob
+from conftest import API
+
+
+def _source_file(tmp_path) -> str:
+    path = tmp_path / "resume.pdf"
+    path.write_bytes(b"%PDF-1.4 " + uuid.uuid4().bytes)
+    return str(path)
+
+
+async def _acquire(path: str) -> str:
+    async with SessionLocal() as db:
+        async with blob_store.ingest_path(path) as blob:
+            await acquire_blob(db, blob, "application/pdf")
+        await db.commit()
+    return blob.sha256
+
+
+async def _release(sha256: str) -> bool:
+    async with SessionLocal() as db:
+        orphaned = await release_blob(db, sha256)
+        await db.commit()
+    return orphaned
+
+
+async def _collect(sha256: str) -> bool:
+    async with SessionLocal() as db:
+        return await collect_blob(db, sha256)
+
+
+async def _refcount(sha256: str):
+    async with SessionLocal() as db:
+        blob = await db.get(Blob, sha256)
+        return blob.refcount if blob is not None else None
+
+
+def test_content_kept_until_last_reference(client, run, tmp_path):
+    path = _source_file(tmp_path)
+    sha256 = run(_acquire, path)
+    assert run(_acquire, path) == sha256
+    assert run(_refcount, sha256) == 2
+
+    assert run(_release, sha256) is False
+    assert os.path.exists(blob_store.path_for(sha256))
+
+    assert run(_release, sha256) is True
+    assert run(_collect, sha256) is True
+    assert run(_refcount, sha256) is None
+    assert not os.path.exists(blob_store.path_for(sha256))
+
+
+def test_reacquire_before_collect_keeps_content(client, run, tmp_path):
+    path = _source_file(tmp_path)
+    sha256 = run(_acquire, path)
+    assert run(_release, sha256) is True
+
+    # Same content uploaded again between the delete's commit and its cleanup
+    run(_acquire, path)
+    assert run(_collect, sha256) is False
+    assert run(_refcount, sha256) == 1
+    assert os.path.exists(blob_store.path_for(sha256))
+
+
+def test_acquire_after_collect_stores_content_again(client, run, tmp_path):
+    path = _source_file(tmp_path)
+    sha256 = run(_acquire, path)
+    run(_release, sha256)
+    run(_collect, sha256)
+
+    run(_acquire, path)
+    assert run(_refcount, sha256) == 1
+    assert os.path.exists(blob_store.path_for(sha256))
+
+
+def test_failed_upload_leaves_no_spool_file(client, run):
+    chunks = [b"%PDF-1.4 partial"]
+
+    async def read(size: int) -> bytes:
+        if not chunks:
+            raise ConnectionResetError("client went away")
+        return chunks.pop()
+
+    async def spool():
+        async with blob_store.ingest(type("Upload", (), {"read": staticmethod(read)})()):
+            pass
+
+    before = set(os.listdir(blob_store.spool_dir))
+    with pytest.raises(ConnectionResetError):
+        run(spool)
+    assert set(os.listdir(blob_store.spool_dir)) == before
+
+
+def _pdf_bytes() -> bytes:
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("helvetica", size=12)
+    pdf.multi_cell(0, 6, f"Alex Example, backend engineer {uuid.uuid4().hex}")
+    return bytes(pdf.output())
+
+
+def test_original_download_supports_ranges(client, auth_headers):
+    content = _pdf_bytes()
+    upload = client.post(f"{API}/resume/upload", headers=auth_headers,
+                         files={"file": ("resume.pdf", content, "application/pdf")})
+    assert upload.status_code == 200
+    url = f"{API}/resume/{upload.json()['id']}/original"
+
+    full = client.get(url, headers=auth_headers)
+    assert full.content == content
+    assert full.headers["Accept-Ranges"] == "bytes"
+
+    partial = client.get(url, headers={**auth_headers, "Range": "bytes=0-9"})
+    assert partial.status_code == 206
+    assert partial.content == content[:10]
+    assert partial.headers["Content-Range"] == f"bytes 0-9/{len(content)}"
+
+    tail = client.get(url, headers={**auth_headers, "Range": "bytes=-5"})
+    assert tail.status_code == 206
+    assert tail.content == content[-5:]
@@ -0,0 +1,74 @@
+import asyncio
+import uuid
+
+from app.core.db import SessionLocal
+from app.services import ai_service as ai_service_module
+from app.services import suggestions
+from app.services.ai_service import ai_service
+from conftest import API
+
+
+def _count_suggestion_calls(monkeypatch, delay: float = 0.0):
+    calls = []
+    stub = ai_service.stub
+    real_generate = stub.generate
+
+    async def counting(prompt, method):
+        if method == "get_section_suggestions":
+            calls.append(prompt)
+            await asyncio.sleep(delay)
+        return await real_generate(prompt, method)
+
+    monkeypatch.setattr(stub, "generate", counting)
+    return calls
+
+
+async def _suggest(role: str) -> dict:
+    async with SessionLocal() as db:
+        return await suggestions.get_suggestions(db, "summary", role, "Senior")
+
+
+def test_concurrent_misses_share_one_call(client, run, monkeypatch):
+    calls = _count_suggestion_calls(monkeypatch, delay=0.05)
+    role = f"Role {uuid.uuid4().hex[:8]}"
+
+    async def burst():
+        return await asyncio.gather(*(_suggest(role) for _ in range(3)))
+
+    first, second, third = run(burst)
+    assert len(calls) == 1
+    assert first == second == third
+    assert first["suggestions"]
+
+
+def test_store_serves_repeat_requests(client, auth_headers, monkeypatch):
+    calls = _count_suggestion_calls(monkeypatch)
+    body = {"section_name": "skills", "job_role": f"Role {uuid.uuid4().hex[:8]}",
+            "experience_level": "Junior", "industry": "IT"}
+
+    first = client.post(f"{API}/resume/ai-assistant", headers=auth_headers, json=body)
+    assert first.status_code == 200
+    assert len(calls) == 1
+
+    # Same key, differently cased: served from the store
+    again = client.post(f"{API}/resume/ai-assistant", headers=auth_headers,
+                        json={**body, "job_role": body["job_role"].upper()})
+    assert again.json() == first.json()
+    assert len(calls) == 1
+
+    # Sections with the user's content always go to the model
+    client.post(f"{API}/resume/ai-assistant", headers=auth_headers,
+                json={**body, "current_content": "Python, SQL"})
+    assert len(calls) == 2
+
+
+def test_stale_prompt_version_is_a_miss(client, run, monkeypatch):
+    calls = _count_suggestion_calls(monkeypatch)
+    role = f"Role {uuid.uuid4().hex[:8]}"
+    run(_suggest, role)
+    run(_suggest, role)
+    assert len(calls) == 1
+
+    monkeypatch.setattr(ai_service_module, "SUGGESTION_PROMPT_HASH", "edited-prompt")
+    run(_suggest, role)
+    assert len(calls) == 2